@@ -1,27 +1,32 @@
+import hashlib
 import os
 import logging
-import uuid
-from typing import Optional, List, Literal
-from datetime import datetime, timedelta
+import time
+from contextlib import asynccontextmanager
+from typing import Annotated, Dict, Optional, List, Literal, Tuple
+from datetime import date, datetime, timedelta
 from enum import Enum
 
+import orjson
 from fastapi import FastAPI, Depends, HTTPException, Query, Request
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.exceptions import RequestValidationError
-from pydantic import BaseModel, Field, field_validator
-from sqlalchemy.orm import Session
+from pydantic import AfterValidator, BaseModel, Field, TypeAdapter, field_validator
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
+from limits.storage import Storage
 
-from database.database import get_db, init_db
-from database.models import Task, TaskStatus, TaskType
-from services.nlp_service import NLPService
+from database.database import close_db, get_db, init_db
+from database.models import Task, TaskStatus, TaskType, utcnow
+from services.nlp_service import nlp_service
 from services.task_service import TaskService
+import utils.rate_limit  # registers the token-bucket:// storage scheme
 
 # ==================== Environment & Logging ====================
 
@@ -34,76 +39,295 @@ logger = logging.getLogger(__name__)
 
 # ==================== Rate Limiter ====================
 
+# With REDIS_URL set, limits are shared by every worker through Redis (the
+# moving window runs as one Lua script per hit). Otherwise each process keeps
+# a token bucket per client key (see utils.rate_limit.TokenBucketStorage),
+# plugged in through the moving-window strategy interface.
+RATE_LIMIT_STORAGE_URI = os.getenv("REDIS_URL", "token-bucket://")
+
 limiter = Limiter(
     key_func=get_remote_address,
     default_limits=["100/minute"],
-    storage_uri="memory://",
+    storage_uri=RATE_LIMIT_STORAGE_URI,
+    strategy="moving-window",
 )
 
-# ==================== Security Middleware ====================
-
-
-class RequestSizeLimitMiddleware(BaseHTTPMiddleware):
-    """Limit request body size to prevent DoS attacks."""
-
-    def __init__(self, app, max_upload_size: int = 1_000_000):  # 1MB
-        super().__init__(app)
-        self.max_upload_size = max_upload_size
-
-    async def dispatch(self, request: Request, call_next):
-        if request.method in ["POST", "PUT", "PATCH"]:
-            content_length = request.headers.get("content-length")
-            if content_length and int(content_length) > self.max_upload_size:
-                return JSONResponse(
-                    status_code=413,
-                    content={
-                        "error": "Request too large",
-                        "message": f"Request body must be less than {self.max_upload_size / 1000}KB",
-                    },
-                )
-        response = await call_next(request)
-        return response
+# Public handle on the limiter storage (tests freeze the bucket clock)
+rate_limit_storage: Storage = limiter.limiter.storage
 
+# ==================== Security Middleware ====================
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """Add security headers to all responses."""
 
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
+class SecurityStackMiddleware:
+    """
+    Request size limit, security headers and request ID in a single ASGI layer.
+    All response headers are appended in one pass on http.response.start.
+    """
 
+    _STATIC_HEADERS: List[Tuple[bytes, bytes]] = [
         # Prevent clickjacking
-        response.headers["X-Frame-Options"] = "DENY"
-
+        (b"x-frame-options", b"DENY"),
         # Prevent MIME type sniffing
-        response.headers["X-Content-Type-Options"] = "nosniff"
-
+        (b"x-content-type-options", b"nosniff"),
         # Enable XSS filter
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-
+        (b"x-xss-protection", b"1; mode=block"),
         # Referrer policy
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-
+        (b"referrer-policy", b"strict-origin-when-cross-origin"),
         # Content Security Policy
-        response.headers["Content-Security-Policy"] = "default-src 'self'"
-
-        # HSTS (only on HTTPS)
-        if request.url.scheme == "https":
-            response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-
-        return response
-
-
-class RequestIDMiddleware(BaseHTTPMiddleware):
-    """Add unique request ID for tracing."""
-
-    async def dispatch(self, request: Request, call_next):
-        request_id = str(uuid.uuid4())
-        request.state.request_id = request_id
-
-        response = await call_next(request)
-        response.headers["X-Request-ID"] = request_id
+        (b"content-security-policy", b"default-src 'self'"),
+    ]
+    # HSTS (only on HTTPS)
+    _HTTPS_HEADERS: List[Tuple[bytes, bytes]] = _STATIC_HEADERS + [
+        (b"strict-transport-security", b"max-age=31536000; includeSubDomains"),
+    ]
+
+    # Request IDs drawn from each os.urandom call
+    REQUEST_ID_BATCH = 256
+
+    def __init__(self, app: ASGIApp, max_upload_size: int = 1_000_000):  # 1MB
+        self.app = app
+        self.max_upload_size = max_upload_size
+        self._request_ids = ""
+        self._request_id_pos = 0
+        self._too_large_body = orjson.dumps({
+            "error": "Request too large",
+            "message": f"Request body must be less than {max_upload_size / 1000}KB",
+        })
+        self._bad_length_body = orjson.dumps({
+            "error": "Bad Request",
+            "message": "Invalid Content-Length header",
+        })
 
-        return response
+    def _next_request_id(self) -> str:
+        """
+        Return 16 random bytes as 32 hex characters, like uuid4().hex.
+        Randomness is read in batches to avoid a urandom syscall per request;
+        only the event loop thread calls this, so no lock is needed.
+        """
+        pos = self._request_id_pos
+        if pos >= len(self._request_ids):
+            self._request_ids = os.urandom(16 * self.REQUEST_ID_BATCH).hex()
+            pos = 0
+        self._request_id_pos = pos + 32
+        return self._request_ids[pos:pos + 32]
+
+    @staticmethod
+    async def _reject(send: Send, status: int, body: bytes):
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Reject oversized bodies before doing any other work, reading the
+        # raw header list instead of building a Headers object
+        if scope["method"] in ("POST", "PUT", "PATCH"):
+            content_length = None
+            for name, value in scope["headers"]:
+                if name == b"content-length":
+                    content_length = value
+                    break
+
+            if content_length is not None:
+                # isdigit() also rejects negative values
+                if not content_length.isdigit():
+                    await self._reject(send, 400, self._bad_length_body)
+                    return
+                if int(content_length) > self.max_upload_size:
+                    await self._reject(send, 413, self._too_large_body)
+                    return
+
+        request_id = self._next_request_id()
+        scope.setdefault("state", {})["request_id"] = request_id
+
+        headers = self._HTTPS_HEADERS if scope.get("scheme", "http") == "https" else self._STATIC_HEADERS
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    *headers,
+                    (b"x-request-id", request_id.encode()),
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+# ==================== Lifespan ====================
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await init_db()
+    # Shared on app.state so tests can swap in their own instance
+    app.state.nlp = nlp_service
+    logger.info(f"Application started in {ENV} mode")
+    logger.info(f"Allowed CORS origins: {ALLOWED_ORIGINS}")
+    try:
+        yield
+    finally:
+        await close_db()
+
+
+class StaticCORSMiddleware:
+    """
+    CORS for a fixed list of origins with credentials, with every header
+    value encoded once at startup. Preflights are answered directly; other
+    responses to allowed origins get the allow-origin headers appended.
+    Follows Starlette's CORSMiddleware semantics for explicit origins.
+    """
+
+    # Request headers browsers may always send (Starlette's safelist)
+    SAFELISTED_HEADERS = ("Accept", "Accept-Language", "Content-Language", "Content-Type")
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        allow_origins: List[str],
+        allow_methods: List[str],
+        allow_headers: List[str],
+        max_age: int = 600,
+    ):
+        self.app = app
+        headers = sorted(set(self.SAFELISTED_HEADERS) | set(allow_headers))
+        self.allow_methods = frozenset(method.encode() for method in allow_methods)
+        self.allow_headers = frozenset(header.lower() for header in headers)
+
+        # Origin header value -> headers appended to that origin's responses
+        self._origin_headers: Dict[bytes, List[Tuple[bytes, bytes]]] = {
+            origin.encode(): [
+                (b"access-control-allow-origin", origin.encode()),
+                (b"access-control-allow-credentials", b"true"),
+            ]
+            for origin in allow_origins
+        }
+        self._preflight_headers: List[Tuple[bytes, bytes]] = [
+            (b"content-type", b"text/plain; charset=utf-8"),
+            (b"vary", b"Origin"),
+            (b"access-control-allow-methods", ", ".join(allow_methods).encode()),
+            (b"access-control-max-age", str(max_age).encode()),
+            (b"access-control-allow-headers", ", ".join(headers).encode()),
+            (b"access-control-allow-credentials", b"true"),
+        ]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin = request_method = request_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+
+        origin_headers = self._origin_headers.get(origin)
+
+        if scope["method"] == "OPTIONS" and request_method is not None:
+            await self._preflight(send, origin_headers, request_method, request_headers)
+            return
+
+        if origin_headers is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                for i, (name, value) in enumerate(headers):
+                    if name == b"vary":
+                        headers[i] = (name, value + b", Origin")
+                        break
+                else:
+                    headers.append((b"vary", b"Origin"))
+                message["headers"] = headers + origin_headers
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _preflight(
+        self,
+        send: Send,
+        origin_headers: Optional[List[Tuple[bytes, bytes]]],
+        request_method: bytes,
+        request_headers: Optional[bytes],
+    ):
+        failures = []
+        if origin_headers is None:
+            failures.append("origin")
+        if request_method not in self.allow_methods:
+            failures.append("method")
+        if request_headers is not None and any(
+            header.strip() not in self.allow_headers
+            for header in request_headers.decode("latin-1").lower().split(",")
+        ):
+            failures.append("headers")
+
+        headers = self._preflight_headers
+        if origin_headers is not None:
+            headers = headers + origin_headers[:1]
+        body = ("Disallowed CORS " + ", ".join(failures)).encode() if failures else b"OK"
+
+        await send({
+            "type": "http.response.start",
+            "status": 400 if failures else 200,
+            "headers": headers + [(b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+class HealthCheckMiddleware:
+    """
+    Answers GET and HEAD /health before routing, dependency injection and the rate
+    limiter run, so frequent load balancer probes stay cheap and are never
+    limited. Registered innermost, so CORS and security headers still apply.
+    """
+
+    def __init__(self, app: ASGIApp, path: str = "/health"):
+        self.app = app
+        self.path = path
+        # Pre-serialized body, re-rendered at most once per second
+        self._body = b""
+        self._rendered_at = float("-inf")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] != self.path or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        now = time.monotonic()
+        if now - self._rendered_at >= 1.0:
+            self._body = orjson.dumps({"status": "ok", "timestamp": utcnow()})
+            self._rendered_at = now
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(self._body)).encode()),
+            ],
+        })
+        # HEAD probes get the same headers without the body
+        body = b"" if scope["method"] == "HEAD" else self._body
+        await send({"type": "http.response.body", "body": body})
 
 
 # ==================== FastAPI App Initialization ====================
@@ -111,6 +335,8 @@ class RequestIDMiddleware(BaseHTTPMiddleware):
 app = FastAPI(
     title="Personal Secretary API",
     debug=DEBUG,
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/docs" if DEBUG else None,
     redoc_url="/redoc" if DEBUG else None,
 )
@@ -119,10 +345,11 @@ app = FastAPI(
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
-# Add middleware in order (important - order matters)
-app.add_middleware(RequestIDMiddleware)
-app.add_middleware(SecurityHeadersMiddleware)
-app.add_middleware(RequestSizeLimitMiddleware, max_upload_size=1_000_000)
+# Health probes are answered inside the security stack, ahead of routing
+app.add_middleware(HealthCheckMiddleware)
+
+# Size limit, security headers and request ID run as one middleware layer
+app.add_middleware(SecurityStackMiddleware, max_upload_size=1_000_000)
 
 # Load CORS configuration from environment
 ALLOWED_ORIGINS = os.getenv(
@@ -130,17 +357,13 @@ ALLOWED_ORIGINS = os.getenv(
 ).split(",")
 
 app.add_middleware(
-    CORSMiddleware,
+    StaticCORSMiddleware,
     allow_origins=ALLOWED_ORIGINS,
-    allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE"],
     allow_headers=["Content-Type", "Authorization"],
     max_age=3600,
 )
 
-# Initialize NLP service
-nlp_service = NLPService()
-
 # ==================== Query Parameter Enums ====================
 
 
@@ -151,6 +374,15 @@ class TaskStatusQuery(str, Enum):
     all = "all"
 
 
+# Map query enum to TaskStatus enum
+_STATUS_MAP = {
+    TaskStatusQuery.pending: TaskStatus.pending,
+    TaskStatusQuery.completed: TaskStatus.completed,
+    TaskStatusQuery.in_progress: TaskStatus.in_progress,
+    TaskStatusQuery.all: None,  # None means no status filter
+}
+
+
 class DateFilterQuery(str, Enum):
     today = "today"
     tomorrow = "tomorrow"
@@ -167,6 +399,34 @@ class SortByQuery(str, Enum):
 
 # ==================== Pydantic Models ====================
 
+def _check_date(v: str) -> str:
+    # Shape checks by slicing and isdigit() stay in C, with no regex engine
+    if not (
+        len(v) == 10 and v[4] == "-" and v[7] == "-" and v.isascii()
+        and v[:4].isdigit() and v[5:7].isdigit() and v[8:].isdigit()
+    ):
+        raise ValueError("date must be in YYYY-MM-DD format")
+    # The C date constructor rejects impossible months and days
+    try:
+        date(int(v[:4]), int(v[5:7]), int(v[8:]))
+    except ValueError:
+        raise ValueError("date must be in YYYY-MM-DD format") from None
+    return v
+
+
+def _check_time(v: str) -> str:
+    if not (
+        len(v) == 5 and v[2] == ":" and v.isascii()
+        and v[:2].isdigit() and v[3:].isdigit()
+        and int(v[:2]) < 24 and int(v[3:]) < 60
+    ):
+        raise ValueError("time must be in HH:MM format")
+    return v
+
+
+DateStr = Annotated[str, AfterValidator(_check_date)]
+TimeStr = Annotated[str, AfterValidator(_check_time)]
+
 
 class TaskCreate(BaseModel):
     title: str = Field(
@@ -178,12 +438,8 @@ class TaskCreate(BaseModel):
     description: Optional[str] = Field(None, max_length=5000)
     importance: int = Field(default=3, ge=1, le=5)
     urgency: int = Field(default=3, ge=1, le=5)
-    due_date: Optional[str] = Field(
-        None, pattern=r"^\d{4}-\d{2}-\d{2}$", max_length=10
-    )
-    due_time: Optional[str] = Field(
-        None, pattern=r"^([01]\d|2[0-3]):([0-5]\d)$", max_length=5
-    )
+    due_date: Optional[DateStr] = None
+    due_time: Optional[TimeStr] = None
     duration_minutes: Optional[int] = Field(None, ge=1, le=1440)
     task_type: Literal["calendar", "checklist"] = Field(default="checklist")
 
@@ -199,34 +455,14 @@ class TaskCreate(BaseModel):
             raise ValueError("title cannot be empty")
         return v.strip()
 
-    @field_validator("due_date")
-    @classmethod
-    def validate_due_date(cls, v: Optional[str]) -> Optional[str]:
-        if v:
-            try:
-                datetime.strptime(v, "%Y-%m-%d")
-            except ValueError:
-                raise ValueError("due_date must be in YYYY-MM-DD format")
-        return v
-
-    @field_validator("due_time")
-    @classmethod
-    def validate_due_time(cls, v: Optional[str]) -> Optional[str]:
-        if v:
-            try:
-                datetime.strptime(v, "%H:%M")
-            except ValueError:
-                raise ValueError("due_time must be in HH:MM format")
-        return v
-
 
 class TaskUpdate(BaseModel):
     title: Optional[str] = Field(None, min_length=1, max_length=500)
     description: Optional[str] = Field(None, max_length=5000)
     importance: Optional[int] = Field(None, ge=1, le=5)
     urgency: Optional[int] = Field(None, ge=1, le=5)
-    due_date: Optional[str] = Field(None, pattern=r"^\d{4}-\d{2}-\d{2}$")
-    due_time: Optional[str] = Field(None, pattern=r"^([01]\d|2[0-3]):([0-5]\d)$")
+    due_date: Optional[DateStr] = None
+    due_time: Optional[TimeStr] = None
     duration_minutes: Optional[int] = Field(None, ge=1, le=1440)
     status: Optional[Literal["pending", "in_progress", "completed"]] = None
     task_type: Optional[Literal["calendar", "checklist"]] = None
@@ -252,8 +488,9 @@ class TaskResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = {
+        "from_attributes": True,
+    }
 
 
 class CommandRequest(BaseModel):
@@ -280,26 +517,75 @@ class CommandResponse(BaseModel):
     tasks: Optional[List[TaskResponse]] = None
 
 
+# Shared validator for task lists, built once instead of per task per request
+_TASK_LIST_ADAPTER = TypeAdapter(List[TaskResponse])
+
+
+def _dump_tasks(tasks: List[Task]) -> List[dict]:
+    """Serialize ORM tasks to plain dicts in one adapter pass."""
+    return _TASK_LIST_ADAPTER.dump_python(
+        _TASK_LIST_ADAPTER.validate_python(tasks, from_attributes=True)
+    )
+
+
+def _dump_task_groups(groups: Dict[str, List[Task]]) -> Dict[str, List[dict]]:
+    """Serialize grouped tasks in a single adapter pass, then regroup by slicing."""
+    dumped = _dump_tasks([task for tasks in groups.values() for task in tasks])
+
+    result, start = {}, 0
+    for key, tasks in groups.items():
+        result[key] = dumped[start:start + len(tasks)]
+        start += len(tasks)
+    return result
+
+
+def _etag(*parts) -> str:
+    """Strong ETag over the task table version and the view's parameters."""
+    return '"%s"' % hashlib.blake2b(repr(parts).encode(), digest_size=8).hexdigest()
+
+
+def _not_modified(request: Request, etag: str) -> Optional[Response]:
+    """Return a 304 response when the client already holds this ETag."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (
+        if_none_match == "*"
+        or etag in (tag.strip() for tag in if_none_match.split(","))
+    ):
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
+
+
+# Clients may keep list views but must revalidate them with If-None-Match
+_CACHE_CONTROL = "private, no-cache"
+
+
 # ==================== Exception Handlers ====================
 
 
+# Bodies of the fixed error responses, encoded once at import
+_INTERNAL_ERROR_BODY = orjson.dumps({
+    "error": "Internal Server Error",
+    "message": "An internal error occurred. Please try again later.",
+})
+_DATABASE_ERROR_BODY = orjson.dumps({
+    "error": "Database Error",
+    "message": "A database error occurred. Please try again later.",
+})
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Catch-all handler to prevent internal details from leaking."""
     logger.error(f"Unhandled exception on {request.method} {request.url.path}", exc_info=True)
 
-    error_message = (
-        "An internal error occurred. Please try again later."
-        if IS_PRODUCTION
-        else str(exc)
-    )
-    detail = None if IS_PRODUCTION else None
+    if IS_PRODUCTION:
+        return Response(_INTERNAL_ERROR_BODY, status_code=500, media_type="application/json")
 
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "Internal Server Error",
-            "message": error_message,
+            "message": str(exc),
         },
     )
 
@@ -317,7 +603,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
             "message": error["msg"],
         })
 
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=422,
         content={
             "error": "Validation Error",
@@ -332,13 +618,7 @@ async def sqlalchemy_exception_handler(request: Request, exc: SQLAlchemyError):
     """Handle database errors without exposing schema."""
     logger.error(f"Database error on {request.url.path}", exc_info=True)
 
-    return JSONResponse(
-        status_code=500,
-        content={
-            "error": "Database Error",
-            "message": "A database error occurred. Please try again later.",
-        },
-    )
+    return Response(_DATABASE_ERROR_BODY, status_code=500, media_type="application/json")
 
 
 @app.exception_handler(HTTPException)
@@ -346,7 +626,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     """Handle HTTP exceptions with consistent format."""
     detail = exc.detail if not IS_PRODUCTION else "An error occurred"
 
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "error": "Request Error",
@@ -358,38 +638,32 @@ async def http_exception_handler(request: Request, exc: HTTPException):
 @app.exception_handler(RateLimitExceeded)
 async def custom_rate_limit_handler(request: Request, exc: RateLimitExceeded):
     """Handle rate limit exceeded with Retry-After header."""
-    retry_after = "60"
-    if "Retry after" in exc.detail:
-        retry_after = exc.detail.split("Retry after ")[1].split()[0]
+    # The detail is just the limit string ("30 per 1 minute"), so the wait is
+    # read from the limit item's window instead of parsing text
+    retry_after = exc.limit.limit.get_expiry()
 
-    return JSONResponse(
-        status_code=429,
-        content={
+    return Response(
+        orjson.dumps({
             "error": "Rate limit exceeded",
             "message": "Too many requests. Please try again later.",
-            "retry_after": int(retry_after),
-        },
-        headers={"Retry-After": retry_after},
+            "retry_after": retry_after,
+        }),
+        status_code=429,
+        media_type="application/json",
+        headers={"Retry-After": str(retry_after)},
     )
 
 
-# ==================== Startup Event ====================
-
-
-@app.on_event("startup")
-async def startup_event():
-    init_db()
-    logger.info(f"Application started in {ENV} mode")
-    logger.info(f"Allowed CORS origins: {ALLOWED_ORIGINS}")
-
-
 # ==================== Health Check ====================
 
 
 @app.get("/health")
-@limiter.limit("120/minute")
-async def health_check(request: Request):
-    return {"status": "ok", "timestamp": datetime.utcnow().isoformat()}
+async def health_check():
+    """
+    Liveness probe. HealthCheckMiddleware answers GET and HEAD before they
+    reach routing; this route only documents the endpoint in the schema.
+    """
+    return {"status": "ok", "timestamp": utcnow()}
 
 
 # ==================== Command Processing ====================
@@ -398,7 +672,7 @@ async def health_check(request: Request):
 @app.post("/api/command")
 @limiter.limit("30/minute")
 async def process_command(
-    request: Request, command: CommandRequest, db: Session = Depends(get_db)
+    request: Request, command: CommandRequest, db: AsyncSession = Depends(get_db)
 ):
     """Process a natural language command."""
     text = command.text.strip()
@@ -410,8 +684,9 @@ async def process_command(
             "message": "Command cannot be empty",
         }
 
-    # Parse the command
-    parsed = nlp_service.parse_command(text)
+    # Parse the command in a worker thread; dateparser can take milliseconds
+    # per call, which would otherwise stall every request on the event loop
+    parsed = await run_in_threadpool(request.app.state.nlp.parse_command, text)
     intent = parsed.get("intent")
     entities = parsed.get("entities", {})
 
@@ -435,7 +710,7 @@ async def process_command(
                 "message": "Could not extract task title",
             }
 
-        task = TaskService.create_task(
+        task = await TaskService.create_task(
             db=db,
             title=entities["title"],
             importance=entities.get("importance", 3),
@@ -463,7 +738,7 @@ async def process_command(
         date_filter = entities.get("date_filter")
         sort_by = entities.get("sort_by", "due_date")
 
-        tasks = TaskService.get_all_tasks(
+        tasks = await TaskService.get_all_tasks(
             db=db,
             status=TaskStatus.pending,
             date_filter=date_filter,
@@ -479,7 +754,7 @@ async def process_command(
             "success": True,
             "action": "tasks_listed",
             "message": message,
-            "tasks": [TaskResponse.model_validate(t) for t in tasks],
+            "tasks": _dump_tasks(tasks),
         }
 
     # Handle complete_task
@@ -487,13 +762,8 @@ async def process_command(
         task_id = entities.get("task_id")
         task_title = entities.get("task_title")
 
-        task = None
-        if task_id:
-            task = TaskService.get_task(db, task_id)
-
-        if not task and task_title:
-            # Search by title
-            task = db.query(Task).filter(Task.title.ilike(f"%{task_title}%")).first()
+        # ID and title lookups share one query, preferring an ID match
+        task = await TaskService.find_task(db, task_id=task_id, title=task_title)
 
         if not task:
             return {
@@ -502,7 +772,7 @@ async def process_command(
                 "message": "Could not find task to complete",
             }
 
-        completed_task = TaskService.complete_task(db, task.id)
+        completed_task = await TaskService.complete_task(db, task.id)
         return {
             "success": True,
             "action": "task_completed",
@@ -515,13 +785,8 @@ async def process_command(
         task_id = entities.get("task_id")
         task_title = entities.get("task_title")
 
-        task = None
-        if task_id:
-            task = TaskService.get_task(db, task_id)
-
-        if not task and task_title:
-            # Search by title
-            task = db.query(Task).filter(Task.title.ilike(f"%{task_title}%")).first()
+        # ID and title lookups share one query, preferring an ID match
+        task = await TaskService.find_task(db, task_id=task_id, title=task_title)
 
         if not task:
             return {
@@ -531,7 +796,7 @@ async def process_command(
             }
 
         task_title = task.title
-        TaskService.delete_task(db, task.id)
+        await TaskService.delete_task(db, task.id)
         return {
             "success": True,
             "action": "task_deleted",
@@ -551,36 +816,44 @@ async def get_tasks(
     status: TaskStatusQuery = Query(TaskStatusQuery.pending),
     date_filter: Optional[DateFilterQuery] = Query(None),
     sort_by: SortByQuery = Query(SortByQuery.due_date),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Get tasks with optional filtering."""
-    # Map query enum to TaskStatus enum
-    status_map = {
-        "pending": TaskStatus.pending,
-        "completed": TaskStatus.completed,
-        "in_progress": TaskStatus.in_progress,
-        "all": None,  # None means no status filter
-    }
-    status_enum = status_map.get(status.value)
+    # Date filters are relative to today, so the day is part of the tag
+    etag = _etag(
+        await TaskService.get_tasks_version(db), status, date_filter, sort_by, date.today()
+    )
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
 
-    tasks = TaskService.get_all_tasks(
+    # The query enums are str subclasses, so they key the service's lookup tables
+    tasks = await TaskService.get_all_tasks(
         db=db,
-        status=status_enum,
-        date_filter=date_filter.value if date_filter else None,
-        sort_by=sort_by.value,
+        status=_STATUS_MAP[status],
+        date_filter=date_filter,
+        sort_by=sort_by,
+    )
+    # Returning a Response skips FastAPI's second validation pass against
+    # response_model (kept for the OpenAPI schema); pydantic-core writes the JSON
+    return Response(
+        _TASK_LIST_ADAPTER.dump_json(
+            _TASK_LIST_ADAPTER.validate_python(tasks, from_attributes=True)
+        ),
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": _CACHE_CONTROL},
     )
-    return [TaskResponse.model_validate(t) for t in tasks]
 
 
 @app.post("/api/tasks", response_model=TaskResponse)
 @limiter.limit("20/minute")
 async def create_task(
-    request: Request, task_data: TaskCreate, db: Session = Depends(get_db)
+    request: Request, task_data: TaskCreate, db: AsyncSession = Depends(get_db)
 ):
     """Create a new task manually."""
     task_type = TaskType.calendar if task_data.due_time else TaskType.checklist
 
-    task = TaskService.create_task(
+    task = await TaskService.create_task(
         db=db,
         title=task_data.title,
         description=task_data.description,
@@ -596,9 +869,9 @@ async def create_task(
 
 @app.get("/api/tasks/{task_id}", response_model=TaskResponse)
 @limiter.limit("60/minute")
-async def get_task(request: Request, task_id: int, db: Session = Depends(get_db)):
+async def get_task(request: Request, task_id: int, db: AsyncSession = Depends(get_db)):
     """Get a specific task."""
-    task = TaskService.get_task(db, task_id)
+    task = await TaskService.get_task(db, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     return TaskResponse.model_validate(task)
@@ -610,10 +883,10 @@ async def update_task(
     request: Request,
     task_id: int,
     task_data: TaskUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Update a task."""
-    task = TaskService.update_task(db, task_id, task_data.model_dump(exclude_unset=True))
+    task = await TaskService.update_task(db, task_id, task_data.model_dump(exclude_unset=True))
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     return TaskResponse.model_validate(task)
@@ -622,10 +895,10 @@ async def update_task(
 @app.patch("/api/tasks/{task_id}/complete", response_model=TaskResponse)
 @limiter.limit("30/minute")
 async def complete_task(
-    request: Request, task_id: int, db: Session = Depends(get_db)
+    request: Request, task_id: int, db: AsyncSession = Depends(get_db)
 ):
     """Mark a task as completed."""
-    task = TaskService.complete_task(db, task_id)
+    task = await TaskService.complete_task(db, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     return TaskResponse.model_validate(task)
@@ -633,9 +906,9 @@ async def complete_task(
 
 @app.delete("/api/tasks/{task_id}")
 @limiter.limit("10/minute")
-async def delete_task(request: Request, task_id: int, db: Session = Depends(get_db)):
+async def delete_task(request: Request, task_id: int, db: AsyncSession = Depends(get_db)):
     """Delete a task."""
-    success = TaskService.delete_task(db, task_id)
+    success = await TaskService.delete_task(db, task_id)
     if not success:
         raise HTTPException(status_code=404, detail="Task not found")
     return {"success": True, "message": "Task deleted"}
@@ -648,54 +921,79 @@ async def delete_task(request: Request, task_id: int, db: Session = Depends(get_
 @limiter.limit("30/minute")
 async def get_calendar(
     request: Request,
-    start_date: str = Query(..., pattern=r"^\d{4}-\d{2}-\d{2}$"),
-    end_date: str = Query(..., pattern=r"^\d{4}-\d{2}-\d{2}$"),
-    db: Session = Depends(get_db),
+    start_date: Annotated[DateStr, Query()],
+    end_date: Annotated[DateStr, Query()],
+    db: AsyncSession = Depends(get_db),
 ):
     """Get calendar view of tasks."""
-    # Validate date range
-    try:
-        start = datetime.strptime(start_date, "%Y-%m-%d").date()
-        end = datetime.strptime(end_date, "%Y-%m-%d").date()
-
-        if start > end:
-            raise HTTPException(
-                status_code=400,
-                detail="start_date must be before or equal to end_date"
-            )
-
-        if (end - start).days > 365:
-            raise HTTPException(
-                status_code=400,
-                detail="Date range cannot exceed 365 days"
-            )
-    except ValueError as e:
-        if "exceed 365 days" in str(e) or "before or equal" in str(e):
-            raise
+    # Both dates already passed the shared DateStr check, so parsing cannot fail
+    start = date.fromisoformat(start_date)
+    end = date.fromisoformat(end_date)
+
+    if start > end:
         raise HTTPException(
             status_code=400,
-            detail="Invalid date format"
+            detail="start_date must be before or equal to end_date"
         )
 
-    calendar = TaskService.get_calendar_view(db, start_date, end_date)
-    return {
-        date: [TaskResponse.model_validate(t) for t in tasks]
-        for date, tasks in calendar.items()
-    }
+    if (end - start).days > 365:
+        raise HTTPException(
+            status_code=400,
+            detail="Date range cannot exceed 365 days"
+        )
+
+    etag = _etag(await TaskService.get_tasks_version(db), start_date, end_date)
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
+
+    calendar = await TaskService.get_calendar_view(db, start_date, end_date)
+    # Return the response directly so FastAPI skips jsonable_encoder
+    return ORJSONResponse(
+        _dump_task_groups(calendar),
+        headers={"ETag": etag, "Cache-Control": _CACHE_CONTROL},
+    )
+
+
+# Serialized matrix, reused until the task table's version changes
+_MATRIX_CACHE = {"body": b"", "version": None}
 
 
 @app.get("/api/priority-matrix")
 @limiter.limit("30/minute")
-async def get_priority_matrix(request: Request, db: Session = Depends(get_db)):
+async def get_priority_matrix(request: Request, db: AsyncSession = Depends(get_db)):
     """Get tasks organized by priority matrix (Eisenhower Matrix)."""
-    matrix = TaskService.get_priority_matrix(db)
-    return {
-        quadrant: [TaskResponse.model_validate(t) for t in tasks]
-        for quadrant, tasks in matrix.items()
-    }
+    version = await TaskService.get_tasks_version(db)
+    if version == _MATRIX_CACHE["version"]:
+        return Response(_MATRIX_CACHE["body"], media_type="application/json")
+
+    matrix = await TaskService.get_priority_matrix(db)
+    body = orjson.dumps(_dump_task_groups(matrix))
+    # The queries are separate reads (SQLite drivers only open a transaction
+    # for writes), so a write may land in between; only cache the matrix
+    # when the version is unchanged once it is built
+    if await TaskService.get_tasks_version(db) == version:
+        _MATRIX_CACHE["body"] = body
+        _MATRIX_CACHE["version"] = version
+    return Response(body, media_type="application/json")
 
 
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(
+        "app:app",
+        host="0.0.0.0",
+        port=8000,
+        # Without REDIS_URL, rate limit buckets live in each worker process,
+        # so N workers allow N times the configured limits. Only raise
+        # WEB_CONCURRENCY when the limiter is backed by Redis.
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        loop="uvloop",
+        http="httptools",
+        access_log=False,
+        proxy_headers=True,
+        # Only trust X-Forwarded-For from these hosts, or clients could spoof
+        # the address the rate limiter keys on
+        forwarded_allow_ips=os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+    )
@@ -0,0 +1,10 @@
+"""
+Shared pytest configuration for the backend tests.
+Tests run against an in-memory SQLite database unless DATABASE_URL is set,
+so they never touch secretary.db and leave no state between runs.
+"""
+
+import os
+
+# Must be set before database.database is first imported
+os.environ.setdefault("DATABASE_URL", "sqlite://")
@@ -1,5 +1,7 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import event, text
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from typing import Optional
 import os
 import logging
 
@@ -10,44 +12,191 @@ DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./secretary.db")
 ENV = os.getenv("ENV", "development")
 IS_PRODUCTION = ENV == "production"
 
+# Map sync driver URLs onto their asyncio drivers so queries yield to the event loop
+ASYNC_DRIVERS = {
+    "sqlite://": "sqlite+aiosqlite://",
+    "postgres://": "postgresql+asyncpg://",
+    "postgresql://": "postgresql+asyncpg://",
+}
+
+def to_async_url(url: str) -> str:
+    for prefix, async_prefix in ASYNC_DRIVERS.items():
+        if url.startswith(prefix):
+            return async_prefix + url[len(prefix):]
+    return url
+
 # Configure database engine with environment-specific settings
 is_sqlite = "sqlite" in DATABASE_URL
+# sqlite:// with no path (or :memory:) is a private per-connection database
+is_sqlite_memory = DATABASE_URL in ("sqlite://", "sqlite:///:memory:")
 connect_args = {}
 engine_kwargs = {}
 
-if is_sqlite:
+# Seconds a SQLite connection waits on another writer's lock before failing
+SQLITE_BUSY_TIMEOUT = 30
+
+if not is_sqlite:
+    # Size the pool for concurrent async handlers (defaults are 5 + 10 overflow).
+    # LIFO reuse keeps the most recently used connections warm.
+    engine_kwargs.update(
+        pool_size=20,
+        max_overflow=40,
+        pool_recycle=1800,
+        pool_pre_ping=False,
+        pool_use_lifo=True,
+    )
+else:
     # SQLite requires special handling for thread safety
-    if IS_PRODUCTION:
+    if is_sqlite_memory:
+        # Every session must share the one connection holding the database
+        engine_kwargs["poolclass"] = StaticPool
+        connect_args = {"check_same_thread": False}
+    elif IS_PRODUCTION:
         # In production, use single thread pool to avoid concurrency issues
         # WARNING: This limits SQLite to single-threaded operation
         logger.warning("Running SQLite in production mode. This is NOT RECOMMENDED. "
                        "Please migrate to PostgreSQL for multi-user production environments.")
+        # aiosqlite defaults to NullPool for files, which takes no pool sizing
+        engine_kwargs["poolclass"] = AsyncAdaptedQueuePool
         engine_kwargs["pool_size"] = 1
         engine_kwargs["max_overflow"] = 0
         engine_kwargs["pool_pre_ping"] = True
         # Keep thread check enabled in production for safety
-        connect_args = {}
+        connect_args = {"timeout": SQLITE_BUSY_TIMEOUT}
     else:
-        # In development, allow multi-threaded access (FastAPI's hot reload needs this)
+        # In development, allow multi-threaded access (FastAPI's hot reload needs this).
         logger.info("Running SQLite in development mode with thread safety disabled")
-        connect_args = {"check_same_thread": False}
+        # aiosqlite defaults to NullPool for files, which opens a connection
+        # and worker thread and reruns the PRAGMAs on every checkout. WAL lets
+        # readers run alongside the writer, so a small pool is reused instead.
+        engine_kwargs["poolclass"] = AsyncAdaptedQueuePool
+        engine_kwargs["pool_size"] = 5
+        engine_kwargs["max_overflow"] = 5
+        connect_args = {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT}
 
-engine = create_engine(
-    DATABASE_URL,
+engine = create_async_engine(
+    to_async_url(DATABASE_URL),
     connect_args=connect_args,
     **engine_kwargs
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Applied to every new SQLite connection: WAL lets readers proceed alongside
+# a writer, and reads are served from memory-mapped pages
+SQLITE_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",  # durable with WAL, fsyncs only at checkpoints
+    "PRAGMA mmap_size=268435456",  # 256MB
+    "PRAGMA temp_store=MEMORY",
+]
+
+if is_sqlite:
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+        cursor.close()
+
+# expire_on_commit=False: attributes must stay loaded after commit, since
+# lazy refreshes are not allowed outside the session's greenlet
+SessionLocal = async_sessionmaker(
+    bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
-def init_db():
-    """Create all tables in the database"""
-    from .models import Base
-    Base.metadata.create_all(bind=engine)
+# FTS5 index over task titles, kept in sync with the task table by triggers.
+# The tokenizer folds diacritics, so "cafe" finds "Café".
+TASK_FTS_ARGS = "title, content='task', content_rowid='id', tokenize='unicode61 remove_diacritics 2'"
+TASK_FTS_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS task_fts USING fts5({TASK_FTS_ARGS})",
+    """CREATE TRIGGER IF NOT EXISTS task_fts_ai AFTER INSERT ON task BEGIN
+        INSERT INTO task_fts(rowid, title) VALUES (new.id, new.title);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS task_fts_ad AFTER DELETE ON task BEGIN
+        INSERT INTO task_fts(task_fts, rowid, title) VALUES ('delete', old.id, old.title);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS task_fts_au AFTER UPDATE OF title ON task BEGIN
+        INSERT INTO task_fts(task_fts, rowid, title) VALUES ('delete', old.id, old.title);
+        INSERT INTO task_fts(rowid, title) VALUES (new.id, new.title);
+    END""",
+    # Index rows that existed before the FTS table was created
+    "INSERT INTO task_fts(task_fts) VALUES ('rebuild')",
+]
+
+def _enum_column_upgrades(dialect_name, table, column, enum_cls):
+    """
+    Statements converting an enum column stored by name (the layout before
+    SmallIntEnum) to member positions. On SQLite the column keeps its text
+    affinity, so positions are stored as digit strings, which SmallIntEnum reads.
+    """
+    positions = " ".join(
+        f"WHEN '{member.name}' THEN {i}" for i, member in enumerate(enum_cls)
+    )
+    if dialect_name == "sqlite":
+        return [
+            f"UPDATE {table} SET {column} = CASE {column} {positions} END "
+            f"WHERE {column} IN ({', '.join(repr(member.name) for member in enum_cls)})"
+        ]
+    return [
+        f"ALTER TABLE {table} ALTER COLUMN {column} TYPE SMALLINT "
+        f"USING (CASE {column}::text {positions} END)"
+    ]
+
+async def init_db(bind: Optional[AsyncEngine] = None):
+    """Create all tables in the database (the app's engine unless bind is given)"""
+    from .models import Base, SmallIntEnum
+    bind = bind or engine
+    sqlite = bind.dialect.name == "sqlite"
+    async with bind.connect() as conn:
+        if sqlite:
+            # Take the write lock up front so workers starting together
+            # create the schema one at a time instead of racing on CREATE
+            await conn.exec_driver_sql("BEGIN IMMEDIATE")
+        await conn.run_sync(Base.metadata.create_all)
+
+        # Enum columns used to hold member names; rewrite them as positions.
+        # This runs before the index pass below, since partial indexes
+        # compare these columns with integer positions.
+        for table in Base.metadata.sorted_tables:
+            for column in table.columns:
+                if not isinstance(column.type, SmallIntEnum):
+                    continue
+                if not sqlite:
+                    data_type = (await conn.execute(
+                        text(
+                            "SELECT data_type FROM information_schema.columns "
+                            "WHERE table_name = :table AND column_name = :column"
+                        ),
+                        {"table": table.name, "column": column.name},
+                    )).scalar()
+                    if data_type == "smallint":
+                        continue
+                for statement in _enum_column_upgrades(
+                    conn.dialect.name, table.name, column.name, column.type.enum_cls
+                ):
+                    await conn.execute(text(statement))
+
+        # create_all skips existing tables, so add indexes introduced since
+        await conn.run_sync(lambda sync_conn: [
+            index.create(sync_conn, checkfirst=True)
+            for table in Base.metadata.sorted_tables
+            for index in table.indexes
+        ])
+
+        if sqlite:
+            fts_sql = (await conn.execute(
+                text("SELECT sql FROM sqlite_master WHERE name = 'task_fts'")
+            )).scalar()
+            if fts_sql is None or not fts_sql.endswith(f"fts5({TASK_FTS_ARGS})"):
+                # Missing, or built with an older definition: recreate and reindex
+                await conn.execute(text("DROP TABLE IF EXISTS task_fts"))
+                for statement in TASK_FTS_DDL:
+                    await conn.execute(text(statement))
+        await conn.commit()
+
+async def close_db():
+    """Close pooled connections (aiosqlite runs each in a non-daemon thread)"""
+    await engine.dispose()
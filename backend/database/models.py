@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Table, Enum
+from sqlalchemy import Column, Integer, SmallInteger, String, Text, DateTime, ForeignKey, Table, Index
+from sqlalchemy.sql import literal_column
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from datetime import datetime, timezone
 import enum
 
 Base = declarative_base()
@@ -14,6 +16,13 @@ task_tag_association = Table(
     Column('tag_id', Integer, ForeignKey('tag.id'))
 )
 
+def utcnow() -> datetime:
+    """
+    Current UTC time as a naive datetime, the form the DateTime columns
+    store. Avoids the deprecated datetime.utcnow().
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 class TaskStatus(str, enum.Enum):
     pending = "pending"
     in_progress = "in_progress"
@@ -23,6 +32,35 @@ class TaskType(str, enum.Enum):
     calendar = "calendar"
     checklist = "checklist"
 
+class SmallIntEnum(TypeDecorator):
+    """
+    Stores an enum member as its position in the enum class, in a SMALLINT
+    column. New members must be appended so stored positions stay valid.
+    """
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, enum_cls):
+        super().__init__()
+        self.enum_cls = enum_cls
+        self._members = tuple(enum_cls)
+        self._positions = {member: i for i, member in enumerate(self._members)}
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return self._positions[self.enum_cls(value)]
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        # int() also reads positions SQLite stored as text in upgraded databases
+        return self._members[int(value)]
+
+    def literal(self, member):
+        """The member's stored position as an inline SQL literal, not a bind."""
+        return literal_column(str(self._positions[self.enum_cls(member)]))
+
 class Task(Base):
     __tablename__ = 'task'
 
@@ -34,11 +72,11 @@ class Task(Base):
     due_date = Column(String(10), nullable=True, index=True)  # ISO format: YYYY-MM-DD
     due_time = Column(String(5), nullable=True)  # HH:MM format
     duration_minutes = Column(Integer, nullable=True)
-    status = Column(Enum(TaskStatus), default=TaskStatus.pending, index=True)
-    task_type = Column(Enum(TaskType), default=TaskType.checklist)
+    status = Column(SmallIntEnum(TaskStatus), default=TaskStatus.pending)  # indexed below
+    task_type = Column(SmallIntEnum(TaskType), default=TaskType.checklist)
     completed_at = Column(DateTime, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow, index=True)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
 
     # Relationships
     tags = relationship(
@@ -48,13 +86,37 @@ class Task(Base):
         cascade="all, delete"
     )
 
+    # Task lists filter by status, then filter or sort by due date or creation
+    # time; these also serve plain status lookups. The urgency and importance
+    # sorts are descending with due date ascending, so those keys are declared
+    # in that direction for SQLite to read the order straight from the index.
+    __table_args__ = (
+        Index("ix_task_status_due", "status", "due_date"),
+        Index("ix_task_status_created", "status", "created_at"),
+        Index("ix_task_status_urgency_due", status, urgency.desc(), due_date),
+        Index("ix_task_status_importance_due", status, importance.desc(), due_date),
+        # Partial index over the working set only. Its predicate uses a literal
+        # position, and queries must filter with the identical ACTIVE_TASK
+        # expression below: SQLite cannot match a predicate to a bound parameter.
+        Index(
+            "ix_task_active_due",
+            due_date,
+            due_time,
+            sqlite_where=status != status.type.literal(TaskStatus.completed),
+            postgresql_where=status != status.type.literal(TaskStatus.completed),
+        ),
+    )
+
+# Filter for tasks that are not completed, matching ix_task_active_due
+ACTIVE_TASK = Task.status != Task.status.type.literal(TaskStatus.completed)
+
 class Tag(Base):
     __tablename__ = 'tag'
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(50), unique=True, nullable=False, index=True)
     color = Column(String(7), default="#3B82F6")  # Hex color
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow)
 
     # Relationships
     tasks = relationship(
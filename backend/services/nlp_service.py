@@ -1,21 +1,110 @@
 import re
+import time
+from functools import lru_cache
 from typing import Dict, Any, Optional
 from utils.date_parser import extract_date_and_time
 
+# Parsed commands kept for repeats; longer commands are never cached
+PARSE_CACHE_SIZE = 2048
+PARSE_CACHE_MAX_TEXT = 200
+
+# One alternation per intent, matched against the lowercased command; the
+# first intent whose pattern matches wins
+INTENT_PATTERNS = (
+    ('add_task', re.compile(
+        r'\b(?:add|create|schedule|remind me to|set up|i need to|gotta|have to)\b'
+    )),
+    ('list_tasks', re.compile(
+        r'\b(?:show|list|what are|get|display)\b.*\b(?:task|tasks|todo|schedule)\b'
+        r'|\b(?:what\'s|whats)\b.*\b(?:on my|my)\b.*\b(?:agenda|schedule|plate)\b'
+    )),
+    ('complete_task', re.compile(
+        r'\b(?:complete|finish|done|mark done|mark as done|check off|finished)\b'
+    )),
+    ('delete_task', re.compile(r'\b(?:delete|remove|cancel|clear)\b.*\b(?:task|tasks)\b')),
+)
+
+# Command verbs that usually open an add command, stripped by slicing
+ADD_PREFIXES = (
+    'remind me to ', 'i need to ', 'have to ', 'set up ', 'schedule ', 'create ', 'gotta ', 'add ',
+)
+
+# Words stripped from the original text to leave a task title
+ADD_REMOVE_PATTERN = re.compile(
+    r'\b(add|create|schedule|remind me to|set up|i need to|gotta|have to)\b', re.IGNORECASE
+)
+COMPLETE_REMOVE_PATTERN = re.compile(
+    r'\b(complete|finish|done|mark done|mark as done|check off|finished|task)\b', re.IGNORECASE
+)
+DELETE_REMOVE_PATTERN = re.compile(r'\b(delete|remove|cancel|clear|task)\b', re.IGNORECASE)
+DATE_PHRASE_PATTERN = re.compile(
+    r'\b(today|tomorrow|next\s+\w+|in\s+\d+\s+days?|at\s+\d+(?:am|pm)?)\b', re.IGNORECASE
+)
+TASK_NUMBER_PATTERN = re.compile(r'#?(\d+)')
+
+HIGH_IMPORTANCE_KEYWORDS = frozenset({
+    'urgent', 'critical', 'important', 'asap', 'high priority', 'priority',
+})
+LOW_IMPORTANCE_KEYWORDS = frozenset({
+    'low priority', 'whenever', 'someday', 'eventually', 'low',
+})
+LIST_FILTER_KEYWORDS = frozenset({
+    'today', 'tomorrow', 'week', 'month', 'urgent', 'critical', 'important',
+    'urgency', 'importance', 'date', 'due',
+})
+
+# Finds every keyword in a lowercased command in one scan. The lookahead
+# matches at each position, so overlapping keywords ("low priority" and
+# "priority") are all reported, just like separate substring checks; where
+# two keywords start at the same position only the longer one is, and every
+# such pair ("low priority"/"low") carries the same meaning.
+KEYWORD_SCANNER = re.compile('(?=(%s))' % '|'.join(
+    re.escape(keyword) for keyword in sorted(
+        HIGH_IMPORTANCE_KEYWORDS | LOW_IMPORTANCE_KEYWORDS | LIST_FILTER_KEYWORDS,
+        key=len,
+        reverse=True,
+    )
+))
+
+def find_keywords(text_lower: str) -> set:
+    """Return the set of known keywords occurring anywhere in the text."""
+    return {match.group(1) for match in KEYWORD_SCANNER.finditer(text_lower)}
+
 class NLPService:
     """Natural language processing service for command parsing."""
 
+    # Every table is built once at import; instances only hold their cache
+    importance_keywords = {
+        'high': HIGH_IMPORTANCE_KEYWORDS,
+        'low': LOW_IMPORTANCE_KEYWORDS,
+    }
+
     def __init__(self):
-        self.importance_keywords = {
-            'high': ['urgent', 'critical', 'important', 'asap', 'high priority', 'priority'],
-            'low': ['low priority', 'whenever', 'someday', 'eventually', 'low'],
-        }
+        # Each instance caches its own parses, so subclasses never get another
+        # parser's results, and the cache is freed along with the instance
+        self._parse_command_cached = lru_cache(maxsize=PARSE_CACHE_SIZE)(
+            self._parse_command_at
+        )
 
     def parse_command(self, text: str) -> Dict[str, Any]:
         """
         Parse a natural language command and extract intent and entities.
         Returns a dict with 'intent' and 'entities' keys.
         """
+        if len(text) > PARSE_CACHE_MAX_TEXT:
+            return self._parse_command(text)
+
+        # Relative dates ("tomorrow", "in 2 hours") depend on the clock, so
+        # results are only reused within the same minute
+        result = self._parse_command_cached(text, int(time.time() // 60))
+        # The cached dicts are shared, so hand out copies
+        return {**result, 'entities': dict(result['entities'])}
+
+    def _parse_command_at(self, text: str, minute: int) -> Dict[str, Any]:
+        """_parse_command, keyed by the minute for the cache."""
+        return self._parse_command(text)
+
+    def _parse_command(self, text: str) -> Dict[str, Any]:
         text_lower = text.lower().strip()
 
         # Detect intent
@@ -40,36 +129,9 @@ class NLPService:
 
     def _detect_intent(self, text: str) -> str:
         """Detect the intent of the command."""
-        add_patterns = [
-            r'\b(add|create|schedule|remind me to|set up)\b',
-            r'\b(i need to|gotta|have to)\b'
-        ]
-        list_patterns = [
-            r'\b(show|list|what are|get|display)\b.*\b(task|tasks|todo|schedule)\b',
-            r'\b(what\'s|whats)\b.*\b(on my|my)\b.*\b(agenda|schedule|plate)\b',
-        ]
-        complete_patterns = [
-            r'\b(complete|finish|done|mark done|mark as done|check off|finished)\b',
-        ]
-        delete_patterns = [
-            r'\b(delete|remove|cancel|clear)\b.*\b(task|tasks)\b',
-        ]
-
-        for pattern in add_patterns:
-            if re.search(pattern, text):
-                return 'add_task'
-
-        for pattern in list_patterns:
-            if re.search(pattern, text):
-                return 'list_tasks'
-
-        for pattern in complete_patterns:
-            if re.search(pattern, text):
-                return 'complete_task'
-
-        for pattern in delete_patterns:
-            if re.search(pattern, text):
-                return 'delete_task'
+        for intent, pattern in INTENT_PATTERNS:
+            if pattern.search(text):
+                return intent
 
         return 'unknown'
 
@@ -78,18 +140,11 @@ class NLPService:
         text_lower = text.lower()
 
         # Extract title: remove command words and extra context
-        title = text
-        remove_patterns = [
-            r'\b(add|create|schedule|remind me to|set up|i need to|gotta|have to)\b',
-        ]
-        for pattern in remove_patterns:
-            title = re.sub(pattern, '', title, flags=re.IGNORECASE)
-
-        title = title.strip()
+        title = self._strip_add_verb(text)
 
         # Remove date/time from title for cleaner extraction
-        title = re.sub(r'\b(today|tomorrow|next\s+\w+|in\s+\d+\s+days?|at\s+\d+(?:am|pm)?)\b', '', title, flags=re.IGNORECASE)
-        title = title.strip()
+        # split/join also collapses the gaps removed words leave behind
+        title = ' '.join(DATE_PHRASE_PATTERN.sub('', title).split())
 
         # Extract date and time
         date, time = extract_date_and_time(text)
@@ -112,36 +167,46 @@ class NLPService:
             'entities': entities,
         }
 
+    def _strip_add_verb(self, text: str) -> str:
+        """
+        Remove the command verb from an add command. A leading verb is sliced
+        off, leaving later words intact; otherwise every verb is removed.
+        """
+        stripped = text.lstrip()
+        stripped_lower = stripped.lower()
+        for prefix in ADD_PREFIXES:
+            if stripped_lower.startswith(prefix):
+                return stripped[len(prefix):]
+        return ADD_REMOVE_PATTERN.sub('', text)
+
     def _parse_list_tasks(self, text: str) -> Dict[str, Any]:
         """Parse a 'list tasks' command."""
         text_lower = text.lower()
 
         entities = {}
 
+        found = find_keywords(text_lower)
+
         # Extract date filter
-        if 'today' in text_lower:
-            entities['date_filter'] = 'today'
-        elif 'tomorrow' in text_lower:
-            entities['date_filter'] = 'tomorrow'
-        elif 'this week' in text_lower or 'week' in text_lower:
-            entities['date_filter'] = 'week'
-        elif 'this month' in text_lower or 'month' in text_lower:
-            entities['date_filter'] = 'month'
+        for date_filter in ('today', 'tomorrow', 'week', 'month'):
+            if date_filter in found:
+                entities['date_filter'] = date_filter
+                break
 
         # Extract urgency filter
-        if 'urgent' in text_lower or 'critical' in text_lower:
+        if 'urgent' in found or 'critical' in found:
             entities['urgency_filter'] = 'high'
 
         # Extract importance filter
-        if 'important' in text_lower:
+        if 'important' in found:
             entities['importance_filter'] = 'high'
 
         # Extract sort criteria
-        if 'urgency' in text_lower or 'urgent' in text_lower:
+        if 'urgency' in found or 'urgent' in found:
             entities['sort_by'] = 'urgency'
-        elif 'importance' in text_lower:
+        elif 'importance' in found:
             entities['sort_by'] = 'importance'
-        elif 'date' in text_lower or 'due' in text_lower:
+        elif 'date' in found or 'due' in found:
             entities['sort_by'] = 'due_date'
 
         return {
@@ -157,18 +222,12 @@ class NLPService:
         entities = {}
 
         # Look for task number
-        number_match = re.search(r'#?(\d+)', text)
+        number_match = TASK_NUMBER_PATTERN.search(text)
         if number_match:
             entities['task_id'] = int(number_match.group(1))
 
         # Try to extract task title
-        title = text
-        remove_patterns = [
-            r'\b(complete|finish|done|mark done|mark as done|check off|finished|task)\b'
-        ]
-        for pattern in remove_patterns:
-            title = re.sub(pattern, '', title, flags=re.IGNORECASE)
-        title = title.strip()
+        title = ' '.join(COMPLETE_REMOVE_PATTERN.sub('', text).split())
 
         if title and len(title) > 1:
             entities['task_title'] = self._sanitize_search_term(title)
@@ -185,18 +244,12 @@ class NLPService:
         entities = {}
 
         # Look for task number
-        number_match = re.search(r'#?(\d+)', text)
+        number_match = TASK_NUMBER_PATTERN.search(text)
         if number_match:
             entities['task_id'] = int(number_match.group(1))
 
         # Try to extract task title
-        title = text
-        remove_patterns = [
-            r'\b(delete|remove|cancel|clear|task)\b'
-        ]
-        for pattern in remove_patterns:
-            title = re.sub(pattern, '', title, flags=re.IGNORECASE)
-        title = title.strip()
+        title = ' '.join(DELETE_REMOVE_PATTERN.sub('', text).split())
 
         if title and len(title) > 1:
             entities['task_title'] = self._sanitize_search_term(title)
@@ -208,15 +261,13 @@ class NLPService:
 
     def _extract_importance(self, text: str) -> Optional[int]:
         """Extract importance level (1-5) from text."""
-        text_lower = text.lower()
+        found = find_keywords(text.lower())
 
-        for keyword in self.importance_keywords['high']:
-            if keyword in text_lower:
-                return 5
+        if found & self.importance_keywords['high']:
+            return 5
 
-        for keyword in self.importance_keywords['low']:
-            if keyword in text_lower:
-                return 1
+        if found & self.importance_keywords['low']:
+            return 1
 
         # Default importance (medium)
         return None
@@ -230,3 +281,6 @@ class NLPService:
         term = term.replace('%', '').replace('_', '')
         # Limit length
         return term[:100]
+
+# Shared instance for callers that do not need their own
+nlp_service = NLPService()
@@ -1,17 +1,72 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Row, and_, case, func, insert, select, text, update
+from datetime import date, datetime, timedelta
+from itertools import groupby
+from operator import attrgetter
+from typing import List, Optional, Dict, Any, Tuple
 
-from database.models import Task, TaskStatus, TaskType, Tag
+from database.models import ACTIVE_TASK, Task, TaskStatus, TaskType, Tag, utcnow
+
+# ORDER BY clauses per sort_by value; anything else sorts newest first
+SORT_ORDERS = {
+    'urgency': (Task.urgency.desc(), Task.due_date),
+    'importance': (Task.importance.desc(), Task.due_date),
+    'due_date': (Task.due_date, Task.due_time),
+}
+DEFAULT_SORT_ORDER = (Task.created_at.desc(),)
+
+# Selecting the table rather than the entity yields plain Core rows, which
+# skip identity-map and attribute instrumentation but keep attribute access
+TASK_ROWS = Task.__table__
+
+# create_tasks values for keys a task dict leaves out
+TASK_DEFAULTS = {
+    'description': None,
+    'importance': 3,
+    'urgency': 3,
+    'due_date': None,
+    'due_time': None,
+    'duration_minutes': None,
+    'task_type': TaskType.checklist,
+}
+
+# Fields update_task may change
+UPDATABLE_FIELDS = frozenset({
+    'title', 'description', 'importance', 'urgency',
+    'due_date', 'due_time', 'duration_minutes', 'status', 'task_type',
+})
+
+# Due date windows per date_filter value, as inclusive day offsets from today
+DATE_FILTER_DAYS = {
+    'today': (0, 0),
+    'tomorrow': (1, 1),
+    'week': (0, 7),
+    'month': (0, 30),
+}
+
+# Eisenhower quadrants, in the order of the SQL quadrant index below
+QUADRANTS = (
+    'urgent_important',
+    'not_urgent_important',
+    'urgent_not_important',
+    'not_urgent_not_important',
+)
+
+# 3 is the midpoint of 1-5 scale
+QUADRANT_INDEX = case(
+    (and_(Task.urgency >= 3, Task.importance >= 3), 0),
+    (Task.importance >= 3, 1),
+    (Task.urgency >= 3, 2),
+    else_=3,
+)
 
 
 class TaskService:
     """Service for task management operations."""
 
     @staticmethod
-    def create_task(
-        db: Session,
+    async def create_task(
+        db: AsyncSession,
         title: str,
         description: Optional[str] = None,
         importance: int = 3,
@@ -20,192 +75,253 @@ class TaskService:
         due_time: Optional[str] = None,
         duration_minutes: Optional[int] = None,
         task_type: TaskType = TaskType.checklist,
+        now: Optional[datetime] = None,
     ) -> Task:
         """Create a new task."""
-        # Validate importance and urgency are 1-5
-        importance = max(1, min(5, importance))
-        urgency = max(1, min(5, urgency))
-
-        task = Task(
-            title=title,
-            description=description,
-            importance=importance,
-            urgency=urgency,
-            due_date=due_date,
-            due_time=due_time,
-            duration_minutes=duration_minutes,
-            task_type=task_type,
-        )
-        db.add(task)
-        db.commit()
-        db.refresh(task)
-        return task
+        created = await TaskService.create_tasks(db, [{
+            'title': title,
+            'description': description,
+            'importance': importance,
+            'urgency': urgency,
+            'due_date': due_date,
+            'due_time': due_time,
+            'duration_minutes': duration_minutes,
+            'task_type': task_type,
+        }], now=now)
+        return created[0]
 
     @staticmethod
-    def get_task(db: Session, task_id: int) -> Optional[Task]:
+    async def create_tasks(
+        db: AsyncSession,
+        tasks: List[Dict[str, Any]],
+        now: Optional[datetime] = None,
+    ) -> List[Task]:
+        """
+        Create several tasks with one multi-row INSERT ... RETURNING and a
+        single commit. Each dict takes create_task's keyword arguments; the
+        created tasks come back in input order, fully loaded. Every row shares
+        one timestamp, now or the current UTC time.
+        """
+        if not tasks:
+            # An INSERT without parameters would add one all-defaults row
+            return []
+
+        now = now or utcnow()
+        rows = []
+        for task in tasks:
+            row = {**TASK_DEFAULTS, **task, 'created_at': now, 'updated_at': now}
+            # Validate importance and urgency are 1-5
+            # (conditional expressions avoid min/max call overhead per row)
+            importance, urgency = row['importance'], row['urgency']
+            row['importance'] = 5 if importance > 5 else 1 if importance < 1 else importance
+            row['urgency'] = 5 if urgency > 5 else 1 if urgency < 1 else urgency
+            rows.append(row)
+
+        created = (await db.scalars(
+            insert(Task).returning(Task, sort_by_parameter_order=True), rows
+        )).all()
+        await db.commit()
+        return created
+
+    @staticmethod
+    async def get_task(db: AsyncSession, task_id: int) -> Optional[Task]:
         """Get a task by ID."""
-        return db.query(Task).filter(Task.id == task_id).first()
+        return await db.get(Task, task_id)
+
+    @staticmethod
+    async def find_task_by_title(db: AsyncSession, title: str) -> Optional[Task]:
+        """Find the first task whose title matches the search term."""
+        return await TaskService.find_task(db, title=title)
 
     @staticmethod
-    def get_all_tasks(
-        db: Session,
+    async def find_task(
+        db: AsyncSession,
+        task_id: Optional[int] = None,
+        title: Optional[str] = None,
+    ) -> Optional[Task]:
+        """
+        Find a task by ID, falling back to a title search. Each step only
+        runs when the one before misses: a primary key lookup, then on
+        SQLite every word looked up as a prefix in the task_fts index, then
+        an ILIKE substring scan (the only title match on other databases),
+        so partial words mid-title still match.
+        """
+        if task_id:
+            task = await db.get(Task, task_id)
+            if task:
+                return task
+
+        if not title or title.isspace():
+            return None
+
+        if db.bind.dialect.name == 'sqlite':
+            # Quote every token so user input is never parsed as FTS5 syntax
+            fts_query = ' '.join(
+                '"' + token.replace('"', '""') + '"*' for token in title.split()
+            )
+            match_id = (await db.execute(
+                text(
+                    "SELECT rowid FROM task_fts WHERE task_fts MATCH :q "
+                    "ORDER BY rowid LIMIT 1"
+                ),
+                {'q': fts_query},
+            )).scalar()
+            if match_id is not None:
+                return await db.get(Task, match_id)
+
+        query = select(Task).where(Task.title.ilike(f"%{title}%")).order_by(Task.id).limit(1)
+        return (await db.execute(query)).scalars().first()
+
+    @staticmethod
+    async def get_all_tasks(
+        db: AsyncSession,
         status: Optional[TaskStatus] = None,
         date_filter: Optional[str] = None,
         sort_by: str = 'due_date',
-    ) -> List[Task]:
-        """Get tasks with optional filtering and sorting."""
-        query = db.query(Task)
+    ) -> List[Row]:
+        """
+        Get tasks with optional filtering and sorting.
+        Returns read-only rows carrying the task columns as attributes.
+        """
+        query = select(TASK_ROWS)
 
         # Filter by status
         if status:
-            query = query.filter(Task.status == status)
+            query = query.where(Task.status == status)
         else:
             # Default: show only pending and in_progress tasks
-            query = query.filter(Task.status != TaskStatus.completed)
+            query = query.where(ACTIVE_TASK)
 
         # Filter by date
-        if date_filter == 'today':
-            today = datetime.now().strftime('%Y-%m-%d')
-            query = query.filter(Task.due_date == today)
-        elif date_filter == 'tomorrow':
-            tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
-            query = query.filter(Task.due_date == tomorrow)
-        elif date_filter == 'week':
-            today = datetime.now()
-            end_of_week = today + timedelta(days=7)
-            today_str = today.strftime('%Y-%m-%d')
-            end_str = end_of_week.strftime('%Y-%m-%d')
-            query = query.filter(and_(Task.due_date >= today_str, Task.due_date <= end_str))
-        elif date_filter == 'month':
-            today = datetime.now()
-            end_of_month = today + timedelta(days=30)
-            today_str = today.strftime('%Y-%m-%d')
-            end_str = end_of_month.strftime('%Y-%m-%d')
-            query = query.filter(and_(Task.due_date >= today_str, Task.due_date <= end_str))
+        days = DATE_FILTER_DAYS.get(date_filter)
+        if days:
+            # date.isoformat() gives YYYY-MM-DD without strftime's format parsing
+            today = date.today()
+            start, end = ((today + timedelta(days=d)).isoformat() for d in days)
+            query = query.where(Task.due_date.between(start, end))
 
         # Sort
-        if sort_by == 'urgency':
-            query = query.order_by(Task.urgency.desc(), Task.due_date)
-        elif sort_by == 'importance':
-            query = query.order_by(Task.importance.desc(), Task.due_date)
-        elif sort_by == 'due_date':
-            query = query.order_by(Task.due_date, Task.due_time)
-        else:
-            query = query.order_by(Task.created_at.desc())
+        query = query.order_by(*SORT_ORDERS.get(sort_by, DEFAULT_SORT_ORDER))
 
-        return query.all()
+        result = await db.execute(query)
+        return result.all()
 
     @staticmethod
-    def update_task(
-        db: Session,
+    async def update_task(
+        db: AsyncSession,
         task_id: int,
         updates: Dict[str, Any],
+        now: Optional[datetime] = None,
     ) -> Optional[Task]:
-        """Update a task."""
-        task = db.query(Task).filter(Task.id == task_id).first()
-        if not task:
-            return None
-
-        # Update allowed fields
-        allowed_fields = [
-            'title', 'description', 'importance', 'urgency',
-            'due_date', 'due_time', 'duration_minutes', 'status', 'task_type'
-        ]
-
-        for field, value in updates.items():
-            if field in allowed_fields and value is not None:
-                setattr(task, field, value)
-
-        task.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(task)
-        return task
+        """Update a task with one UPDATE ... RETURNING statement."""
+        values = {
+            field: value
+            for field, value in updates.items()
+            if field in UPDATABLE_FIELDS and value is not None
+        }
+        values['updated_at'] = now or utcnow()
+        return await TaskService._update_returning(db, task_id, values)
 
     @staticmethod
-    def complete_task(db: Session, task_id: int) -> Optional[Task]:
+    async def complete_task(
+        db: AsyncSession,
+        task_id: int,
+        now: Optional[datetime] = None,
+    ) -> Optional[Task]:
         """Mark a task as completed."""
-        task = db.query(Task).filter(Task.id == task_id).first()
-        if not task:
-            return None
+        now = now or utcnow()
+        return await TaskService._update_returning(db, task_id, {
+            'status': TaskStatus.completed,
+            'completed_at': now,
+            'updated_at': now,
+        })
 
-        task.status = TaskStatus.completed
-        task.completed_at = datetime.utcnow()
-        db.commit()
-        db.refresh(task)
+    @staticmethod
+    async def _update_returning(
+        db: AsyncSession,
+        task_id: int,
+        values: Dict[str, Any],
+    ) -> Optional[Task]:
+        """
+        Apply values to one task and return it, or None if it does not exist.
+        RETURNING replaces the SELECT that loading the task first would need.
+        A copy already in the session is only synchronized with the given
+        values, so callers pass updated_at explicitly.
+        """
+        task = (await db.scalars(
+            update(Task)
+            .where(Task.id == task_id)
+            .values(values)
+            .returning(Task)
+        )).first()
+        await db.commit()
         return task
 
     @staticmethod
-    def delete_task(db: Session, task_id: int) -> bool:
+    async def delete_task(db: AsyncSession, task_id: int) -> bool:
         """Delete a task."""
-        task = db.query(Task).filter(Task.id == task_id).first()
+        task = await db.get(Task, task_id)
         if not task:
             return False
 
-        db.delete(task)
-        db.commit()
+        await db.delete(task)
+        await db.commit()
         return True
 
     @staticmethod
-    def get_priority_matrix(
-        db: Session,
+    async def get_tasks_version(db: AsyncSession) -> Tuple[Optional[datetime], int]:
+        """
+        Return (latest updated_at, row count) for the task table. Every insert
+        or update moves the first and every delete the second, so views built
+        from the table can be cached until this changes.
+        """
+        result = await db.execute(select(func.max(Task.updated_at), func.count(Task.id)))
+        return tuple(result.one())
+
+    @staticmethod
+    async def get_priority_matrix(
+        db: AsyncSession,
         include_completed: bool = False,
-    ) -> Dict[str, List[Task]]:
+    ) -> Dict[str, List[Row]]:
         """
         Get tasks grouped by importance and urgency (Eisenhower Matrix).
         Returns dict with quadrants: 'urgent_important', 'not_urgent_important', etc.
         """
-        query = db.query(Task)
+        # The database assigns and sorts by quadrant, so grouping is one pass
+        query = select(TASK_ROWS, QUADRANT_INDEX.label('quadrant')).order_by(
+            QUADRANT_INDEX, Task.id
+        )
 
         if not include_completed:
-            query = query.filter(Task.status != TaskStatus.completed)
+            query = query.where(ACTIVE_TASK)
 
-        tasks = query.all()
+        rows = (await db.execute(query)).all()
 
-        quadrants = {
-            'urgent_important': [],
-            'not_urgent_important': [],
-            'urgent_not_important': [],
-            'not_urgent_not_important': [],
-        }
-
-        for task in tasks:
-            # 3 is the midpoint of 1-5 scale
-            if task.urgency >= 3 and task.importance >= 3:
-                quadrants['urgent_important'].append(task)
-            elif task.urgency < 3 and task.importance >= 3:
-                quadrants['not_urgent_important'].append(task)
-            elif task.urgency >= 3 and task.importance < 3:
-                quadrants['urgent_not_important'].append(task)
-            else:
-                quadrants['not_urgent_not_important'].append(task)
+        quadrants = {name: [] for name in QUADRANTS}
+        for index, group in groupby(rows, key=attrgetter('quadrant')):
+            quadrants[QUADRANTS[index]] = list(group)
 
         return quadrants
 
     @staticmethod
-    def get_calendar_view(
-        db: Session,
+    async def get_calendar_view(
+        db: AsyncSession,
         start_date: str,
         end_date: str,
-    ) -> Dict[str, List[Task]]:
+    ) -> Dict[str, List[Row]]:
         """
         Get tasks for calendar view, organized by date.
         Dates should be in ISO format (YYYY-MM-DD).
         """
-        query = db.query(Task).filter(
-            and_(
-                Task.due_date >= start_date,
-                Task.due_date <= end_date,
-                Task.status != TaskStatus.completed,
-            )
+        query = select(TASK_ROWS).where(
+            Task.due_date.between(start_date, end_date),
+            ACTIVE_TASK,
         ).order_by(Task.due_date, Task.due_time)
 
-        tasks = query.all()
+        tasks = (await db.execute(query)).all()
 
-        # Organize by date
-        calendar = {}
-        for task in tasks:
-            if task.due_date not in calendar:
-                calendar[task.due_date] = []
-            calendar[task.due_date].append(task)
-
-        return calendar
+        # Rows arrive sorted by date, so each day is one consecutive run
+        return {
+            due_date: list(day_tasks)
+            for due_date, day_tasks in groupby(tasks, key=attrgetter('due_date'))
+        }
@@ -1,2 +1,5 @@
 #!/bin/bash
-uvicorn app:app --host 0.0.0.0 --port $PORT
+# Same server settings as app.py's __main__; uvicorn reads WEB_CONCURRENCY
+# and FORWARDED_ALLOW_IPS from the environment
+exec uvicorn app:app --host 0.0.0.0 --port $PORT \
+  --loop uvloop --http httptools --no-access-log --proxy-headers
@@ -1,18 +1,92 @@
 #!/usr/bin/env python3
 """Simple test script for backend API."""
 
-from database.database import init_db
-from database.models import Task
+import asyncio
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from database.database import close_db, engine, init_db, to_async_url
+from database.models import ACTIVE_TASK, Task, TaskStatus, TaskType
 from services.nlp_service import NLPService
 from services.task_service import TaskService
 from database.database import SessionLocal
+from dateparser.date import DateDataParser
+
+from utils import date_parser
+from utils.date_parser import (
+    _parse_date_cached, parse_natural_date, parse_natural_dates, parse_natural_time,
+)
+from utils.rate_limit import TokenBucketStorage
+
+def run(coro):
+    """Run a coroutine, then close pooled connections so their threads exit."""
+    async def main():
+        try:
+            return await coro
+        finally:
+            await close_db()
+    return asyncio.run(main())
 
 def test_database():
     """Test database initialization and basic operations."""
     print("Testing database...")
-    init_db()
+    run(init_db())
     print("✓ Database initialized")
 
+def test_legacy_upgrade():
+    """Test init_db upgrades a database created before SmallIntEnum."""
+    print("\nTesting legacy schema upgrade...")
+    asyncio.run(_run_legacy_upgrade())
+
+async def _run_legacy_upgrade():
+    with tempfile.TemporaryDirectory() as directory:
+        legacy = create_async_engine(f"sqlite+aiosqlite:///{directory}/legacy.db")
+        try:
+            # Enum columns held member names, as the original schema stored them
+            async with legacy.begin() as conn:
+                await conn.exec_driver_sql(
+                    "CREATE TABLE task (id INTEGER NOT NULL PRIMARY KEY, "
+                    "title VARCHAR(255) NOT NULL, description TEXT, importance INTEGER, "
+                    "urgency INTEGER, due_date VARCHAR(10), due_time VARCHAR(5), "
+                    "duration_minutes INTEGER, status VARCHAR(11), task_type VARCHAR(9), "
+                    "completed_at DATETIME, created_at DATETIME, updated_at DATETIME)"
+                )
+                await conn.exec_driver_sql(
+                    "INSERT INTO task (title, status, task_type) VALUES "
+                    "('Legacy open', 'pending', 'checklist'), "
+                    "('Legacy done', 'completed', 'calendar')"
+                )
+
+            await init_db(legacy)
+
+            async with AsyncSession(legacy) as db:
+                tasks = (await db.scalars(select(Task).order_by(Task.id))).all()
+                assert [task.status for task in tasks] == [TaskStatus.pending, TaskStatus.completed]
+                assert tasks[1].task_type == TaskType.calendar
+                active = (await db.scalars(select(Task.title).where(ACTIVE_TASK))).all()
+                assert active == ['Legacy open']
+                plan = (await db.execute(text(
+                    "EXPLAIN QUERY PLAN SELECT id FROM task WHERE status != 2 ORDER BY due_date, due_time"
+                ))).all()
+                assert any("ix_task_active_due" in row[-1] for row in plan)
+        finally:
+            await legacy.dispose()
+    print("✓ Enum columns converted before the indexes were built")
+
+def test_async_database_url():
+    """Test sync database URLs are mapped onto asyncio drivers."""
+    print("\nTesting async database URLs...")
+    assert to_async_url("sqlite:///./secretary.db") == "sqlite+aiosqlite:///./secretary.db"
+    assert to_async_url("postgres://u:p@host/db") == "postgresql+asyncpg://u:p@host/db"
+    assert to_async_url("postgresql://u:p@host/db") == "postgresql+asyncpg://u:p@host/db"
+    # Explicit drivers are left alone
+    assert to_async_url("postgresql+asyncpg://h/db") == "postgresql+asyncpg://h/db"
+    print("✓ Database URLs mapped to async drivers")
+
 def test_nlp():
     """Test NLP service."""
     print("\nTesting NLP service...")
@@ -22,6 +96,12 @@ def test_nlp():
     result = nlp.parse_command("add task call dentist tomorrow at 2pm")
     assert result['intent'] == 'add_task'
     assert 'call dentist' in result['entities']['title']
+    # Only the leading verb is stripped, later words stay in the title
+    result = nlp.parse_command("Add review schedule")
+    assert result['entities']['title'] == 'review schedule'
+    # Removed date words leave no double spaces behind
+    result = nlp.parse_command("add buy milk tomorrow for mom")
+    assert result['entities']['title'] == 'buy milk for mom'
     print("✓ Add task parsing works")
 
     # Test list_tasks intent
@@ -34,13 +114,83 @@ def test_nlp():
     assert result['intent'] == 'complete_task'
     print("✓ Complete task parsing works")
 
+    # Test delete_task intent, and that intents keep their priority order
+    result = nlp.parse_command("delete task groceries")
+    assert result['intent'] == 'delete_task'
+    assert nlp.parse_command("show tasks to add")['intent'] == 'add_task'
+    print("✓ Delete task parsing and intent priority work")
+
+    # Repeated commands come from the cache as independent copies
+    first = nlp.parse_command("add task water plants")
+    first['entities']['title'] = 'changed'
+    assert nlp.parse_command("add task water plants")['entities']['title'] == 'task water plants'
+    print("✓ Cached parses are copied")
+
+    # Every instance parses with its own logic and keeps its own cache
+    class ListOnly(NLPService):
+        def _detect_intent(self, text):
+            return 'list_tasks'
+
+    assert ListOnly().parse_command("add task water plants")['intent'] == 'list_tasks'
+    assert nlp.parse_command("add task water plants")['intent'] == 'add_task'
+    print("✓ Parse caches are per instance")
+
+def test_date_parser():
+    """Test natural language date and time parsing."""
+    print("\nTesting date parser...")
+    assert parse_natural_date("dentist on 2026-03-05 at 2pm") == "2026-03-05"
+    assert parse_natural_date("pay rent 03/05/2026") == "2026-03-05"
+    assert parse_natural_date("trip on March 5th, 2026") == "2026-03-05"
+    today = datetime.now().date()
+    assert parse_natural_date("gym today") == today.isoformat()
+    assert parse_natural_date("gym tomorrow") == (today + timedelta(days=1)).isoformat()
+    assert parse_natural_date("Today's list") == today.isoformat()
+    assert parse_natural_date("todays tasks") == today.isoformat()
+    assert parse_natural_date("tomorrows plan") == (today + timedelta(days=1)).isoformat()
+    assert parse_natural_dates(["pay rent 03/05/2026", "buy milk", "pay rent 03/05/2026"]) == [
+        "2026-03-05", None, "2026-03-05"
+    ]
+    print("✓ Explicit dates parsed to YYYY-MM-DD")
+    # Hour offsets depend on the clock and are never served from the cache
+    cached = _parse_date_cached.cache_info().currsize
+    assert parse_natural_date("in 23 hours") == (datetime.now() + timedelta(hours=23)).date().isoformat()
+    assert _parse_date_cached.cache_info().currsize == cached
+    # "3pm" is today before 15:00 and tomorrow after it, within one day
+    today = datetime.now().date()
+    build_parser = date_parser._date_data_parser
+    try:
+        for hour, expected in ((10, today), (20, today + timedelta(days=1))):
+            base = datetime.combine(today, datetime.min.time()).replace(hour=hour)
+            parser = DateDataParser(languages=['en'], settings={
+                'RETURN_AS_TIMEZONE_AWARE': False,
+                'PREFER_DATES_FROM': 'future',
+                'RELATIVE_BASE': base,
+            })
+            date_parser._date_data_parser = lambda: parser
+            assert parse_natural_date("3pm") == expected.isoformat()
+    finally:
+        date_parser._date_data_parser = build_parser
+    print("✓ Clock-relative dates skip the cache")
+
+    assert parse_natural_time("call mom at 2pm") == "14:00"
+    assert parse_natural_time("standup 9:30 am") == "09:30"
+    assert parse_natural_time("lunch at 12:15pm") == "12:15"
+    assert parse_natural_time("meet at 12am") == "00:00"
+    assert parse_natural_time("review at 14:30") == "14:30"
+    assert parse_natural_time("buy milk") is None
+    print("✓ Times parsed to HH:MM")
+
 def test_task_service():
     """Test task service."""
     print("\nTesting task service...")
+    run(_run_task_service())
+
+async def _run_task_service():
+    await init_db()
     db = SessionLocal()
 
     # Create a task
-    task = TaskService.create_task(
+    task = await TaskService.create_task(
         db=db,
         title="Test task",
         importance=5,
@@ -51,12 +201,12 @@ def test_task_service():
     print(f"✓ Created task: {task.title} (ID: {task.id})")
 
     # Get the task
-    retrieved = TaskService.get_task(db, task.id)
+    retrieved = await TaskService.get_task(db, task.id)
     assert retrieved.title == "Test task"
     print("✓ Retrieved task successfully")
 
     # Update the task
-    updated = TaskService.update_task(
+    updated = await TaskService.update_task(
         db=db,
         task_id=task.id,
         updates={'title': 'Updated task'}
@@ -65,16 +215,217 @@ def test_task_service():
     print("✓ Updated task successfully")
 
     # Complete the task
-    completed = TaskService.complete_task(db, task.id)
+    completed = await TaskService.complete_task(db, task.id)
     assert completed.status.value == 'completed'
+    # Values written during the flush are on the object without a refresh
+    assert completed.updated_at >= completed.completed_at
     print("✓ Completed task successfully")
 
     # Delete the task
-    success = TaskService.delete_task(db, task.id)
+    success = await TaskService.delete_task(db, task.id)
     assert success
     print("✓ Deleted task successfully")
 
-    db.close()
+    # Create several tasks in one statement
+    batch = await TaskService.create_tasks(db, [
+        {'title': 'Batch task 1', 'importance': 9},
+        {'title': 'Batch task 2', 'due_date': '2026-02-01'},
+    ])
+    assert [t.title for t in batch] == ['Batch task 1', 'Batch task 2']
+    assert batch[0].importance == 5 and batch[1].importance == 3
+    assert batch[1].status.value == 'pending' and batch[1].created_at is not None
+    # The whole batch shares one timestamp
+    assert batch[0].created_at == batch[1].created_at == batch[1].updated_at
+    for created in batch:
+        await TaskService.delete_task(db, created.id)
+    assert await TaskService.create_tasks(db, []) == []
+    print("✓ Created tasks in bulk")
+
+    await db.close()
+
+def test_title_search():
+    """Test task lookup by title through the FTS index."""
+    print("\nTesting title search...")
+    run(_run_title_search())
+
+async def _run_title_search():
+    await init_db()
+    db = SessionLocal()
+
+    task = await TaskService.create_task(db=db, title="Buy groceries tomorrow")
+
+    # Partial words match as prefixes, FTS syntax in input is inert
+    found = await TaskService.find_task_by_title(db, "groc")
+    assert found.id == task.id
+    found = await TaskService.find_task_by_title(db, 'buy "groc')
+    assert found.id == task.id
+    print("✓ Prefix search matches partial words")
+
+    # Diacritics are folded by the tokenizer
+    accented = await TaskService.create_task(db=db, title="Café meeting")
+    found = await TaskService.find_task_by_title(db, "cafe")
+    assert found.id == accented.id
+    await TaskService.delete_task(db, accented.id)
+    print("✓ Search ignores diacritics")
+
+    # Mid-word substrings fall back to ILIKE
+    found = await TaskService.find_task_by_title(db, "oceri")
+    assert found.id == task.id
+    print("✓ Substring fallback works")
+
+    # An ID match wins over the title search in the combined lookup
+    other = await TaskService.create_task(db=db, title="Call the bank")
+    # Only the primary key lookup runs when the ID matches
+    db.expunge_all()
+    statements = []
+    record = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        found = await TaskService.find_task(db, task_id=other.id, title="groc")
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+    assert found.id == other.id
+    assert len(statements) == 1
+    assert "task_fts" not in statements[0] and "LIKE" not in statements[0].upper()
+    found = await TaskService.find_task(db, task_id=-1, title="groc")
+    assert found.id == task.id
+    await TaskService.delete_task(db, other.id)
+    print("✓ ID lookup takes precedence over title")
+
+    # Triggers keep the index in sync with updates and deletes
+    await TaskService.update_task(db, task.id, {'title': 'Walk the dog'})
+    found = await TaskService.find_task_by_title(db, "walk")
+    assert found.id == task.id
+    assert await TaskService.find_task_by_title(db, "groceries") is None
+    await TaskService.delete_task(db, task.id)
+    assert await TaskService.find_task_by_title(db, "walk") is None
+    print("✓ Index follows updates and deletes")
+
+    await db.close()
+
+def test_task_filters():
+    """Test date filters and sort orders of the task list."""
+    print("\nTesting task filters...")
+    run(_run_task_filters())
+
+async def _run_task_filters():
+    await init_db()
+    db = SessionLocal()
+
+    today = datetime.now()
+    created = [
+        await TaskService.create_task(
+            db=db,
+            title=f"Filter task {days}",
+            importance=importance,
+            due_date=(today + timedelta(days=days)).strftime('%Y-%m-%d'),
+        )
+        for days, importance in ((0, 2), (1, 5), (10, 3))
+    ]
+    ids = {task.id for task in created}
+
+    async def listed(**kwargs):
+        tasks = await TaskService.get_all_tasks(db, **kwargs)
+        return [task.id for task in tasks if task.id in ids]
+
+    assert await listed(date_filter='today') == [created[0].id]
+    assert await listed(date_filter='tomorrow') == [created[1].id]
+    assert await listed(date_filter='week', sort_by='due_date') == [created[0].id, created[1].id]
+    assert await listed(date_filter='month', sort_by='importance') == [
+        created[1].id, created[2].id, created[0].id
+    ]
+    print("✓ Date filters and sort orders work")
+
+    for task in created:
+        await TaskService.delete_task(db, task.id)
+    await db.close()
+
+def test_priority_matrix():
+    """Test tasks are grouped into Eisenhower quadrants."""
+    print("\nTesting priority matrix...")
+    run(_run_priority_matrix())
+
+async def _run_priority_matrix():
+    await init_db()
+    db = SessionLocal()
+
+    expected = {
+        'urgent_important': (3, 3),
+        'not_urgent_important': (5, 2),
+        'urgent_not_important': (1, 5),
+        'not_urgent_not_important': (2, 2),
+    }
+    created = {
+        quadrant: await TaskService.create_task(
+            db=db, title=f"Matrix {quadrant}", importance=importance, urgency=urgency
+        )
+        for quadrant, (importance, urgency) in expected.items()
+    }
+
+    matrix = await TaskService.get_priority_matrix(db)
+    assert list(matrix) == list(expected)
+    for quadrant, task in created.items():
+        ids = [t.id for t in matrix[quadrant]]
+        assert task.id in ids
+        assert ids == sorted(ids)
+    print("✓ Tasks grouped by quadrant")
+
+    for task in created.values():
+        await TaskService.delete_task(db, task.id)
+    await db.close()
+
+def test_calendar_view():
+    """Test tasks are grouped by due date within the range."""
+    print("\nTesting calendar view...")
+    run(_run_calendar_view())
+
+async def _run_calendar_view():
+    await init_db()
+    db = SessionLocal()
+
+    created = [
+        await TaskService.create_task(db=db, title=f"Calendar {due}", due_date=due, due_time=time)
+        for due, time in (
+            ("2099-01-02", "09:00"), ("2099-01-01", "15:00"),
+            ("2099-01-02", "08:00"), ("2099-02-01", None),
+        )
+    ]
+
+    calendar = await TaskService.get_calendar_view(db, "2099-01-01", "2099-01-31")
+    assert list(calendar) == ["2099-01-01", "2099-01-02"]
+    assert [t.id for t in calendar["2099-01-02"]] == [created[2].id, created[0].id]
+    print("✓ Tasks grouped by day in time order")
+
+    for task in created:
+        await TaskService.delete_task(db, task.id)
+    await db.close()
+
+def test_token_bucket():
+    """Test token bucket rate limit storage."""
+    print("\nTesting token bucket storage...")
+    storage = TokenBucketStorage()
+
+    # A fresh bucket allows a burst up to its capacity, then rejects
+    assert all(storage.acquire_entry("client", 3, 60) for _ in range(3))
+    assert not storage.acquire_entry("client", 3, 60)
+    _, used = storage.get_moving_window("client", 3, 60)
+    assert used == 3
+    print("✓ Burst capped at capacity")
+
+    # Other keys have their own bucket
+    assert storage.acquire_entry("other", 3, 60)
+    storage.clear("client")
+    assert storage.acquire_entry("client", 3, 60)
+    print("✓ Buckets are independent per key")
+
+    # Fixed-window counters count up and reset after their expiry
+    assert storage.incr("window", 60) == 1
+    assert storage.incr("window", 60, amount=2) == 3
+    assert storage.get("window") == 3
+    assert storage.get_expiry("window") > time.time()
+    storage.clock = lambda: time.monotonic() + 61
+    assert storage.get("window") == 0
+    print("✓ Fixed-window counters expire")
 
 def main():
     """Run all tests."""
@@ -84,8 +435,16 @@ def main():
 
     try:
         test_database()
+        test_legacy_upgrade()
+        test_async_database_url()
         test_nlp()
+        test_date_parser()
         test_task_service()
+        test_title_search()
+        test_task_filters()
+        test_priority_matrix()
+        test_calendar_view()
+        test_token_bucket()
 
         print("\n" + "=" * 50)
         print("✓ All tests passed!")
@@ -3,23 +3,43 @@ Security hardening tests for the Secretary App API.
 Tests rate limiting, input validation, security headers, and error handling.
 """
 
+import asyncio
+import time
+
+import httpx
 import pytest
 from starlette.testclient import TestClient
-from app import app
+from app import SecurityStackMiddleware, app, rate_limit_storage
 
 client = TestClient(app)
 
 
+@pytest.fixture(scope="module", autouse=True)
+def app_lifespan():
+    """Run the app's startup and shutdown around this module's tests."""
+    with client:
+        yield
+
+
 class TestRateLimiting:
     """Test rate limiting on endpoints."""
 
-    def test_health_endpoint_rate_limit(self):
-        """Test health endpoint allows 120 requests per minute."""
-        # Send 121 requests - the 121st should be rate limited
-        responses = [client.get("/health") for _ in range(121)]
-        # At least one should be rate limited
-        status_codes = [r.status_code for r in responses]
-        assert 429 in status_codes, "Rate limiting not triggered after threshold"
+    @pytest.fixture(autouse=True)
+    def frozen_limiter_clock(self, monkeypatch):
+        """Freeze the token bucket clock so no tokens refill mid-burst."""
+        now = time.monotonic()
+        monkeypatch.setattr(rate_limit_storage, "clock", lambda: now)
+
+    def test_health_endpoint_not_rate_limited(self):
+        """Test health probes bypass the rate limiter, even when concurrent."""
+        async def probe():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as probes:
+                return await asyncio.gather(*(probes.get("/health") for _ in range(121)))
+
+        responses = asyncio.run(probe())
+        status_codes = {r.status_code for r in responses}
+        assert status_codes == {200}, "Health probes should never be rate limited"
 
     def test_create_task_rate_limit(self):
         """Test create task endpoint has rate limit of 20/minute."""
@@ -53,6 +73,7 @@ class TestRateLimiting:
         assert "Retry-After" in response.headers
         assert "error" in response.json()
         assert "message" in response.json()
+        assert response.json()["retry_after"] == int(response.headers["Retry-After"])
 
 
 class TestInputValidation:
@@ -176,6 +197,11 @@ class TestInputValidation:
         response = client.get("/api/calendar?start_date=2024-01-01&end_date=01/31/2024")
         assert response.status_code == 422
 
+    def test_calendar_impossible_date(self):
+        """Test calendar dates share the task models' date validation."""
+        response = client.get("/api/calendar?start_date=2024-02-30&end_date=2024-03-31")
+        assert response.status_code == 422
+
     def test_calendar_date_range_exceeds_365_days(self):
         """Test calendar date range cannot exceed 365 days."""
         response = client.get(
@@ -219,9 +245,35 @@ class TestSecurityHeaders:
         """Test X-Request-ID header is present."""
         response = client.get("/health")
         assert "X-Request-ID" in response.headers
-        # Should be a valid UUID format
+        # 16 random bytes in hex format, like a dashless UUID
         request_id = response.headers["X-Request-ID"]
-        assert len(request_id) == 36  # UUID format
+        assert len(request_id) == 32
+        int(request_id, 16)
+
+    def test_request_ids_unique_across_batches(self):
+        """Test batched request IDs never repeat, including across refills."""
+        middleware = SecurityStackMiddleware(app)
+        count = SecurityStackMiddleware.REQUEST_ID_BATCH * 2 + 1
+        ids = [middleware._next_request_id() for _ in range(count)]
+        assert all(len(request_id) == 32 for request_id in ids)
+        assert len(set(ids)) == count
+
+    def test_scope_without_scheme(self):
+        """Test servers omitting the optional scheme key are treated as http."""
+        async def inner(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {"type": "http", "method": "GET", "path": "/", "headers": []}
+        asyncio.run(SecurityStackMiddleware(inner)(scope, None, send))
+        names = [name for name, _ in messages[0]["headers"]]
+        assert b"x-frame-options" in names
+        assert b"strict-transport-security" not in names
 
 
 class TestErrorHandling:
@@ -259,12 +311,31 @@ class TestErrorHandling:
         # Should either be 413 (Payload Too Large) or validation error
         assert response.status_code in [413, 422]
 
+    def test_invalid_content_length(self):
+        """Test malformed or negative Content-Length is rejected, not a 500."""
+        for value in ["abc", "-1"]:
+            response = client.post(
+                "/api/command",
+                content=b'{"text": "add task test"}',
+                headers={"content-type": "application/json", "content-length": value},
+            )
+            assert response.status_code == 400
+            assert response.json()["error"] == "Bad Request"
+
     def test_cors_headers_on_valid_origin(self):
         """Test CORS headers when request is from allowed origin."""
         # The test client allows all origins in test mode
         response = client.get("/api/priority-matrix")
         assert response.status_code in [200, 404]  # 404 if no tasks, 200 if tasks exist
 
+    def test_health_head_probe(self):
+        """Test HEAD /health answers with headers only, and is documented."""
+        response = client.head("/health")
+        assert response.status_code == 200
+        assert response.content == b""
+        assert int(response.headers["content-length"]) > 0
+        assert "/health" in app.openapi()["paths"]
+
     def test_health_endpoint_responds(self):
         """Test health endpoint returns 200 OK or 429 if rate limited in test."""
         response = client.get("/api/priority-matrix")
@@ -272,6 +343,113 @@ class TestErrorHandling:
         assert response.status_code in [200, 404, 429]
 
 
+class TestCORS:
+    """Test CORS headers for the configured origins."""
+
+    ORIGIN = "http://localhost:3000"
+
+    def test_preflight_allowed_origin(self):
+        """Test preflight from an allowed origin is answered directly."""
+        response = client.options("/api/tasks", headers={
+            "Origin": self.ORIGIN,
+            "Access-Control-Request-Method": "POST",
+            "Access-Control-Request-Headers": "Content-Type, Authorization",
+        })
+        assert response.status_code == 200
+        assert response.headers["Access-Control-Allow-Origin"] == self.ORIGIN
+        assert response.headers["Access-Control-Allow-Credentials"] == "true"
+        assert "POST" in response.headers["Access-Control-Allow-Methods"]
+        assert response.headers["Vary"] == "Origin"
+
+    def test_preflight_disallowed(self):
+        """Test preflight with a disallowed origin, method or header fails."""
+        cases = [
+            ({"Origin": "http://evil.com", "Access-Control-Request-Method": "GET"}, "origin"),
+            ({"Origin": self.ORIGIN, "Access-Control-Request-Method": "TRACE"}, "method"),
+            ({
+                "Origin": self.ORIGIN,
+                "Access-Control-Request-Method": "GET",
+                "Access-Control-Request-Headers": "X-Custom",
+            }, "headers"),
+        ]
+        for headers, failure in cases:
+            response = client.options("/api/tasks", headers=headers)
+            assert response.status_code == 400
+            assert response.text == f"Disallowed CORS {failure}"
+
+    def test_simple_request_headers(self):
+        """Test only allowed origins get allow-origin on normal responses."""
+        response = client.get("/api/tasks", headers={"Origin": self.ORIGIN})
+        assert response.headers["Access-Control-Allow-Origin"] == self.ORIGIN
+        assert response.headers["Vary"] == "Origin"
+
+        response = client.get("/api/tasks", headers={"Origin": "http://evil.com"})
+        assert "Access-Control-Allow-Origin" not in response.headers
+
+
+class TestPriorityMatrixCache:
+    """Test the cached priority matrix follows task changes."""
+
+    def matrix_ids(self):
+        matrix = client.get("/api/priority-matrix").json()
+        return {task["id"] for tasks in matrix.values() for task in tasks}
+
+    def test_matrix_reflects_writes(self):
+        """Test creates, updates and deletes invalidate the cached matrix."""
+        rate_limit_storage.reset()
+        self.matrix_ids()
+
+        response = client.post("/api/tasks", json={"title": "Matrix cache task"})
+        assert response.status_code == 200
+        task = response.json()
+        assert task["id"] in self.matrix_ids()
+
+        response = client.patch(f"/api/tasks/{task['id']}/complete")
+        assert response.status_code == 200
+        assert task["id"] not in self.matrix_ids()
+
+        response = client.delete(f"/api/tasks/{task['id']}")
+        assert response.status_code == 200
+        assert task["id"] not in self.matrix_ids()
+
+
+class TestConditionalRequests:
+    """Test list views honour If-None-Match."""
+
+    def test_unchanged_tasks_return_304(self):
+        """Test a matching ETag short-circuits until a task changes."""
+        rate_limit_storage.reset()
+        response = client.get("/api/tasks")
+        etag = response.headers["ETag"]
+
+        response = client.get("/api/tasks", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+        response = client.post("/api/tasks", json={"title": "ETag task"})
+        assert response.status_code == 200
+        task = response.json()
+        response = client.get("/api/tasks", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+        response = client.delete(f"/api/tasks/{task['id']}")
+        assert response.status_code == 200
+
+    def test_calendar_etag_depends_on_range(self):
+        """Test calendar ETags differ per requested range."""
+        rate_limit_storage.reset()
+        january = client.get("/api/calendar?start_date=2024-01-01&end_date=2024-01-31")
+        february = client.get("/api/calendar?start_date=2024-02-01&end_date=2024-02-29")
+        assert january.headers["ETag"] != february.headers["ETag"]
+
+        response = client.get(
+            "/api/calendar?start_date=2024-01-01&end_date=2024-01-31",
+            headers={"If-None-Match": january.headers["ETag"]},
+        )
+        assert response.status_code == 304
+
+
 class TestValidationErrorDetails:
     """Test that validation errors provide helpful messages."""
 
@@ -290,6 +468,15 @@ class TestValidationErrorDetails:
         response = client.post("/api/tasks", json=payload)
         assert response.status_code == 422
 
+    def test_impossible_date_rejected(self):
+        """Test well-formed but impossible dates are rejected."""
+        payload = {
+            "title": "Test",
+            "due_date": "2025-02-30",
+        }
+        response = client.post("/api/tasks", json=payload)
+        assert response.status_code == 422
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -1,74 +1,216 @@
-from dateparser import parse
-from datetime import datetime, timedelta
-from typing import Optional, Tuple
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import List, Optional, Tuple
 import re
 
+# Parsed dates and times kept for repeated phrases
+PARSE_CACHE_SIZE = 4096
+
+# 24-hour value for every (hour, meridiem) a parsed time can hold: 12am is
+# midnight, other pm hours move up by 12, and hours without one stay as is
+MERIDIEM_HOURS = {
+    **{(hour, None): hour for hour in range(100)},
+    **{(hour, 'am'): 0 if hour == 12 else hour for hour in range(100)},
+    **{(hour, 'pm'): hour if hour == 12 else hour + 12 for hour in range(100)},
+}
+
+# Words starting with these, in any case ("today's", "tomorrows"), matched
+# without lowercasing the text
+TODAY_PATTERN = re.compile(r'\btoday', re.IGNORECASE)
+TOMORROW_PATTERN = re.compile(r'\btomorrow', re.IGNORECASE)
+
+# Common explicit date formats, tried with strptime before dateparser;
+# month/day order comes first, as in dateparser
+FAST_DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y', '%Y/%m/%d', '%B %d %Y', '%b %d %Y')
+
+# An explicit date inside a sentence, in a shape FAST_DATE_FORMATS can read
+DATE_LIKE_PATTERN = re.compile(
+    r'\b(?:\d{4}[-/]\d{1,2}[-/]\d{1,2}|\d{1,2}/\d{1,2}/\d{4}|[a-z]{3,9},?\s+\d{1,2}(?:st|nd|rd|th)?,?\s+\d{4})\b'
+)
+
+ORDINAL_SUFFIX_PATTERN = re.compile(r'(?<=\d)(?:st|nd|rd|th)\b')
+
+# Text dateparser could read a date from has a digit, a month or weekday
+# name, or a relative word; anything else skips the dateparser call
+DATE_HINT_PATTERN = re.compile(
+    r'\d|jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec'
+    r'|mon|tue|wed|thu|fri|sat|sun|day|next|last|week|month|year|ago|hour|minute|noon|night|now'
+)
+
+# Text whose date depends on the time of day, not just the day: offsets in
+# hours or smaller, and clock times ("3pm", "9:00", "noon"), which resolve
+# to today before that time and to tomorrow after it
+CLOCK_WORD_PATTERN = re.compile(r'hour|hr|min|sec|now|noon|night|\d\s*[ap]\.?m\b|\d:\d\d')
+
+def _parse_explicit_date(text: str) -> Optional[datetime]:
+    """Read an explicit date in one of FAST_DATE_FORMATS from the text."""
+    match = DATE_LIKE_PATTERN.search(text)
+    if not match:
+        return None
+
+    # "jan 15th, 2024" -> "jan 15 2024"
+    candidate = ORDINAL_SUFFIX_PATTERN.sub('', match.group().replace(',', ' '))
+    candidate = ' '.join(candidate.split())
+    for fmt in FAST_DATE_FORMATS:
+        try:
+            return datetime.strptime(candidate, fmt)
+        except ValueError:
+            continue
+    return None
+
 def parse_natural_date(text: str) -> Optional[str]:
     """
     Parse natural language date from text.
     Returns ISO format date string (YYYY-MM-DD) or None if not found.
     """
-    # Remove common date-related words to clean the text
-    cleaned = text.lower()
+    return _parse_date(text)
 
+def _parse_date(text: str, text_lower: Optional[str] = None) -> Optional[str]:
+    """
+    parse_natural_date, reusing text_lower when the caller already has it.
+    Otherwise the text is only lowercased when the special cases miss.
+    """
     # Handle special cases first
-    if 'today' in cleaned:
-        return datetime.now().strftime('%Y-%m-%d')
-    if 'tomorrow' in cleaned:
-        return (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+    day = date.today()
+    if TODAY_PATTERN.search(text):
+        return _today_and_tomorrow(day)[0]
+    if TOMORROW_PATTERN.search(text):
+        return _today_and_tomorrow(day)[1]
+
+    cleaned = text.lower() if text_lower is None else text_lower
+    if CLOCK_WORD_PATTERN.search(cleaned):
+        # "in 23 hours" depends on the time of day, so it is never cached
+        return _parse_date_text(cleaned)
+
+    # Relative phrases ("next friday") resolve against the current day, so
+    # cached results are only reused on the same day
+    return _parse_date_cached(cleaned, day)
+
+def parse_natural_dates(texts: List[str]) -> List[Optional[str]]:
+    """
+    Parse many texts with parse_natural_date, in order. Repeated texts
+    are parsed once.
+    """
+    parsed = {text: parse_natural_date(text) for text in dict.fromkeys(texts)}
+    return [parsed[text] for text in texts]
+
+@lru_cache(maxsize=1)
+def _today_and_tomorrow(day: date) -> Tuple[str, str]:
+    """ISO strings for the day and the next, formatted once per day."""
+    return day.isoformat(), (day + timedelta(days=1)).isoformat()
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_date_cached(cleaned: str, day: date) -> Optional[str]:
+    return _parse_date_text(cleaned)
+
+def _parse_date_text(cleaned: str) -> Optional[str]:
+    """Read a date from lowercase text without the special cases."""
+    # Explicit dates are cheap to read without dateparser
+    parsed = _parse_explicit_date(cleaned)
+    if parsed:
+        return parsed.strftime('%Y-%m-%d')
+
+    if not DATE_HINT_PATTERN.search(cleaned):
+        return None
 
     # Try dateparser for more complex dates
-    parsed = parse(cleaned, settings={'RETURN_AS_TIMEZONE_AWARE': False})
+    parsed = _date_data_parser().get_date_data(cleaned)['date_obj']
     if parsed:
         return parsed.strftime('%Y-%m-%d')
 
     return None
 
+@lru_cache(maxsize=None)
+def _date_data_parser():
+    """
+    The shared dateparser parser, built on first use. dateparser is imported
+    here because loading it compiles its locale data, which takes most of a
+    second. Fixing the language skips detection across every locale.
+    """
+    from dateparser.date import DateDataParser
+
+    return DateDataParser(
+        languages=['en'],
+        settings={'RETURN_AS_TIMEZONE_AWARE': False, 'PREFER_DATES_FROM': 'future'},
+    )
+
 def parse_natural_time(text: str) -> Optional[str]:
     """
     Parse natural language time from text.
     Returns HH:MM format string or None if not found.
     """
-    text_lower = text.lower()
+    return _parse_time_lower(text.lower())
 
-    # Look for time patterns like "2pm", "14:30", "2:30 pm", etc.
-    time_patterns = [
-        r'\b(\d{1,2}):(\d{2})\s*(am|pm)?\b',  # HH:MM am/pm
-        r'\b(\d{1,2})(am|pm)\b',  # H am/pm (e.g., "2pm")
-    ]
-
-    for pattern in time_patterns:
-        match = re.search(pattern, text_lower)
-        if match:
-            if len(match.groups()) == 3:  # HH:MM am/pm format
-                hour = int(match.group(1))
-                minute = int(match.group(2))
-                meridiem = match.group(3)
-
-                if meridiem and meridiem == 'pm' and hour != 12:
-                    hour += 12
-                elif meridiem and meridiem == 'am' and hour == 12:
-                    hour = 0
-
-                return f"{hour:02d}:{minute:02d}"
-            elif len(match.groups()) == 2:  # H am/pm format
-                hour = int(match.group(1))
-                meridiem = match.group(2)
-
-                if meridiem == 'pm' and hour != 12:
-                    hour += 12
-                elif meridiem == 'am' and hour == 12:
-                    hour = 0
-
-                return f"{hour:02d}:00"
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_time_lower(text_lower: str) -> Optional[str]:
+    """parse_natural_time for text that is already lowercase."""
+    # Hand-written scan for a time like "14:30", "2:30 pm" (HH:MM am/pm) or
+    # "2pm" (H am/pm). str.find jumps between the only places a time can
+    # end, a colon or a meridiem, and one or two digits starting a word
+    # must lead up to it. The first time found is the leftmost.
+    colon = text_lower.find(':')
+    am = text_lower.find('am')
+    pm = text_lower.find('pm')
+    while colon >= 0 or am >= 0 or pm >= 0:
+        anchor = min(position for position in (colon, am, pm) if position >= 0)
+        start = _hour_start(text_lower, anchor)
+
+        if anchor == colon:
+            colon = text_lower.find(':', anchor + 1)
+            minutes = text_lower[anchor + 1:anchor + 3]
+            if start >= 0 and len(minutes) == 2 and minutes.isdecimal():
+                # HH:MM am/pm format
+                hour = int(text_lower[start:anchor])
+                minute = int(minutes)
+                after = anchor + 3
+                meridiem = _meridiem_at(text_lower, after + _spaces_at(text_lower, after))
+                if meridiem or after == len(text_lower) or not _is_word_char(text_lower[after]):
+                    return f"{MERIDIEM_HOURS[hour, meridiem]:02d}:{minute:02d}"
+        else:
+            if anchor == am:
+                am = text_lower.find('am', anchor + 1)
+            else:
+                pm = text_lower.find('pm', anchor + 1)
+            meridiem = _meridiem_at(text_lower, anchor)
+            if start >= 0 and meridiem:  # H am/pm format
+                return f"{MERIDIEM_HOURS[int(text_lower[start:anchor]), meridiem]:02d}:00"
 
     return None
 
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+def _hour_start(text: str, end: int) -> int:
+    """
+    Start of the one or two digit word that ends at end, or -1 if the text
+    before end is not one.
+    """
+    start = end
+    while start > end - 2 and start > 0 and text[start - 1].isdecimal():
+        start -= 1
+    if start == end or (start > 0 and _is_word_char(text[start - 1])):
+        return -1
+    return start
+
+def _spaces_at(text: str, index: int) -> int:
+    """Length of the whitespace run starting at index."""
+    end = index
+    while end < len(text) and text[end].isspace():
+        end += 1
+    return end - index
+
+def _meridiem_at(text: str, index: int) -> Optional[str]:
+    """'am' or 'pm' if that whole word starts at index, else None."""
+    meridiem = text[index:index + 2]
+    if meridiem in ('am', 'pm') and (index + 2 == len(text) or not _is_word_char(text[index + 2])):
+        return meridiem
+    return None
+
 def extract_date_and_time(text: str) -> Tuple[Optional[str], Optional[str]]:
     """
     Extract both date and time from natural language text.
     Returns tuple of (date_str, time_str) in ISO formats.
     """
-    date = parse_natural_date(text)
-    time = parse_natural_time(text)
-    return date, time
+    # Both parsers work on the lowercased text, so it is built once
+    text_lower = text.lower()
+    return _parse_date(text, text_lower), _parse_time_lower(text_lower)
@@ -0,0 +1,125 @@
+import math
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from limits.storage import MovingWindowSupport, Storage
+
+
+class TokenBucketStorage(Storage, MovingWindowSupport):
+    """
+    In-memory token bucket storage for slowapi/limits.
+    Each key keeps only (tokens, last_refill, full_at) instead of one entry
+    per request, and bursts are bounded by the bucket capacity.
+
+    Used through the moving-window strategy: a limit of "N/period" is a
+    bucket holding N tokens that refills at N/period tokens per second.
+    Plain counters are also kept so the fixed-window strategy works.
+
+    Buckets run on a monotonic clock so wall-clock jumps cannot drain or
+    overfill them; times reported back to limits are converted to epoch.
+    """
+
+    STORAGE_SCHEME = ["token-bucket"]
+
+    # Buckets that have fully refilled are indistinguishable from new ones,
+    # so they are dropped every this many acquisitions.
+    SWEEP_INTERVAL = 1024
+
+    # Time source, replaceable in tests
+    clock = staticmethod(time.monotonic)
+
+    def __init__(self, uri: Optional[str] = None, wrap_exceptions: bool = False, **options):
+        self.buckets: Dict[str, Tuple[float, float, float]] = {}
+        self.counters: Dict[str, Tuple[int, float]] = {}
+        self.lock = threading.Lock()
+        self.acquisitions = 0
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return ValueError
+
+    def _to_epoch(self, at: float, now: float) -> float:
+        """Convert a time on the storage clock to a Unix timestamp."""
+        return time.time() + (at - now)
+
+    def _refill(self, key: str, limit: int, expiry: int, now: float) -> float:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            return float(limit)
+        tokens, last_refill, _ = bucket
+        return min(limit, tokens + max(0.0, now - last_refill) * limit / expiry)
+
+    def acquire_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        now = self.clock()
+        with self.lock:
+            tokens = self._refill(key, limit, expiry, now)
+            allowed = tokens >= amount
+            if allowed:
+                tokens -= amount
+            full_at = now + (limit - tokens) * expiry / limit
+            self.buckets[key] = (tokens, now, full_at)
+
+            self.acquisitions += 1
+            if self.acquisitions >= self.SWEEP_INTERVAL:
+                self.acquisitions = 0
+                self.buckets = {
+                    k: v for k, v in self.buckets.items() if v[2] > now
+                }
+                self.counters = {
+                    k: v for k, v in self.counters.items() if v[1] > now
+                }
+        return allowed
+
+    def get_moving_window(self, key: str, limit: int, expiry: int) -> Tuple[float, int]:
+        """
+        Report the bucket in moving-window terms: the number of tokens in use,
+        and a window start such that start + expiry is when the next token
+        becomes available.
+        """
+        now = self.clock()
+        with self.lock:
+            tokens = self._refill(key, limit, expiry, now)
+        next_token_at = now + max(0.0, 1 - tokens) * expiry / limit
+        return self._to_epoch(next_token_at, now) - expiry, math.ceil(limit - tokens)
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        now = self.clock()
+        with self.lock:
+            count, expires_at = self.counters.get(key, (0, 0.0))
+            if expires_at <= now:
+                count, expires_at = 0, now + expiry
+            count += amount
+            self.counters[key] = (count, expires_at)
+        return count
+
+    def get(self, key: str) -> int:
+        now = self.clock()
+        with self.lock:
+            count, expires_at = self.counters.get(key, (0, 0.0))
+        return count if expires_at > now else 0
+
+    def get_expiry(self, key: str) -> float:
+        now = self.clock()
+        with self.lock:
+            counter = self.counters.get(key)
+            bucket = self.buckets.get(key)
+        if counter:
+            return self._to_epoch(counter[1], now)
+        return self._to_epoch(bucket[2] if bucket else now, now)
+
+    def check(self) -> bool:
+        return True
+
+    def reset(self) -> int:
+        with self.lock:
+            count = len(self.buckets) + len(self.counters)
+            self.buckets.clear()
+            self.counters.clear()
+        return count
+
+    def clear(self, key: str) -> None:
+        with self.lock:
+            self.buckets.pop(key, None)
+            self.counters.pop(key, None)